@@ -0,0 +1,80 @@
+"""
+Picks the password hashing cost that fits a latency budget on this host.
+
+Run from the backend folder:
+    python -m app.calibrate_hashing --target-ms 250
+    python -m app.calibrate_hashing --scheme argon2 --target-ms 250 --memory-cost 65536
+
+Prints the settings to put in `.env`. Run it on the production hardware: the
+cost is chosen as the highest one whose median hash time stays within the target.
+"""
+
+from app.security import build_password_context
+import argparse
+import statistics
+import time
+
+SAMPLE_PASSWORD = "Calibrate123!"
+
+
+def median_hash_ms(context, samples: int) -> float:
+    """Median time in milliseconds to hash the sample password."""
+    context.hash(SAMPLE_PASSWORD)  # Warm-up (backend loading)
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(SAMPLE_PASSWORD)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> dict:
+    """Raises bcrypt rounds (each one doubles the cost) while the hash stays within the target."""
+    best = {"PASSWORD_SCHEMES": "bcrypt", "PASSWORD_BCRYPT_ROUNDS": 4}
+    for rounds in range(4, 32):
+        elapsed = median_hash_ms(build_password_context(["bcrypt"], bcrypt_rounds=rounds), samples)
+        print(f"bcrypt rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best["PASSWORD_BCRYPT_ROUNDS"] = rounds
+    return best
+
+def calibrate_argon2(target_ms: float, samples: int, memory_cost: int, parallelism: int) -> dict:
+    """Keeps memory and parallelism fixed and raises the time cost while the hash stays within the target."""
+    best = {
+        "PASSWORD_SCHEMES": "argon2,bcrypt",
+        "PASSWORD_ARGON2_TIME_COST": 1,
+        "PASSWORD_ARGON2_MEMORY_COST": memory_cost,
+        "PASSWORD_ARGON2_PARALLELISM": parallelism,
+    }
+    for time_cost in range(1, 33):
+        context = build_password_context(
+            ["argon2"], argon2_time_cost=time_cost, argon2_memory_cost=memory_cost, argon2_parallelism=parallelism,
+        )
+        elapsed = median_hash_ms(context, samples)
+        print(f"argon2 time_cost={time_cost} memory_cost={memory_cost} parallelism={parallelism}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best["PASSWORD_ARGON2_TIME_COST"] = time_cost
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate the password hashing cost.")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250, help="Latency budget per hash in milliseconds")
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per setting")
+    parser.add_argument("--memory-cost", type=int, default=65536, help="argon2 memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=4, help="argon2 lanes")
+    args = parser.parse_args(argv)
+
+    if args.scheme == "bcrypt":
+        settings = calibrate_bcrypt(args.target_ms, args.samples)
+    else:
+        settings = calibrate_argon2(args.target_ms, args.samples, args.memory_cost, args.parallelism)
+
+    print("\nSuggested settings:")
+    for name, value in settings.items():
+        print(f"{name}={value}")
+
+
+if __name__ == "__main__":
+    main()
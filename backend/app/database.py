@@ -2,20 +2,105 @@
 Database configuration for MongoDB using Motor (AsyncIOMotorClient).
 """
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
-from pymongo.database import Database
+from pymongo import ASCENDING, IndexModel
+from pymongo.collation import Collation
+from app.metrics import MongoCommandListener
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Fetch MongoDB connection URI from .env file
 MONGO_URI = os.getenv("MONGO_URI")
+DATABASE_NAME = "farm_skeleton"
+
+# Connection pool settings (per worker process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 10))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 10000))
+# Connections opened at startup with concurrent pings (defaults to the pool minimum)
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", MONGO_MIN_POOL_SIZE))
+
+# Created per worker by `connect_to_mongo` (lifespan), or lazily on first use
+client = None
+_database = None
+
+
+def create_client() -> AsyncIOMotorClient:
+    """Creates a MongoDB client with the configured pool settings."""
+    return AsyncIOMotorClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        event_listeners=[MongoCommandListener()],
+    )
+
+def get_client() -> AsyncIOMotorClient:
+    """Returns the client of this process, creating it if the lifespan has not run (scripts, tests)."""
+    global client, _database
+    if client is None:
+        client = create_client()
+        _database = client[DATABASE_NAME]
+    return client
+
+def get_database() -> AsyncIOMotorDatabase:
+    get_client()
+    return _database
+
+
+class DatabaseProxy:
+    """Module-level `db` that resolves to the current client's database on each access."""
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+    def __getitem__(self, name):
+        return get_database()[name]
+
+
+db = DatabaseProxy()
+
+
+async def connect_to_mongo():
+    """Creates the client inside the running worker and opens the warm-up connections."""
+    get_client()
+    # Each concurrent ping checks out its own connection, so the pool is filled before traffic arrives
+    warmup = max(MONGO_WARMUP_CONNECTIONS, 1)
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(warmup)))
+    logger.info("MongoDB connected - Pool: %s-%s - Warm connections: %s", MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE, warmup)
+
+def close_mongo_connection():
+    """Closes the client and its pooled connections."""
+    global client, _database
+    if client is not None:
+        client.close()
+        client = None
+        _database = None
+        logger.info("MongoDB connection closed")
+
+# Case-insensitive collation of the unique email index; email queries pass it to use the index
+EMAIL_COLLATION = Collation(locale="en", strength=2)
 
-# Initialize MongoDB client
-client = AsyncIOMotorClient(MONGO_URI)
-db = client.farm_skeleton  # Database name
+# Indexes declared for the users collection
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True, collation=EMAIL_COLLATION),
+    IndexModel([("created", ASCENDING)], name="created"),
+    IndexModel([("role", ASCENDING)], name="role"),
+    # Only soft-deleted users are indexed, so the purge finds them without scanning live users
+    IndexModel([("deleted_at", ASCENDING)], name="deleted_at", partialFilterExpression={"deleted_at": {"$exists": True}}),
+]
 
-def get_database() -> Database:
-    return db
\ No newline at end of file
+async def ensure_indexes():
+    """Creates the declared indexes (no-op for indexes that already exist)."""
+    await db.users.create_indexes(USER_INDEXES)
@@ -0,0 +1,126 @@
+"""
+Batched user lookups (DataLoader style).
+
+Point lookups by `_id` or email made during the same event-loop tick are
+coalesced into one `$in` query, and a lookup for a key that is already being
+fetched waits for that query instead of sending another one. Within a request,
+loaded users are also memoized (USER_LOADER_MEMO), so a dependency and a route
+loading the same user cost a single query. Writers call `forget_users` so the
+rest of the request never reads back a user as it was before the write.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+from app.database import db, EMAIL_COLLATION
+from app.metrics import USER_LOADER_BATCH_SIZE
+from app.soft_delete import not_deleted
+import asyncio
+import os
+
+USER_LOADER_MAX_BATCH = int(os.getenv("USER_LOADER_MAX_BATCH", 500))  # keys per $in query
+USER_LOADER_MEMO = os.getenv("USER_LOADER_MEMO", "true").lower() == "true"
+
+# Users loaded by the current request, set up by RequestContextMiddleware (None outside requests)
+user_memo_var: ContextVar[Optional[dict]] = ContextVar("user_memo", default=None)
+
+LOADERS = []
+
+
+class UserLoader:
+    """Coalesces concurrent lookups of users by one field into a single query per tick."""
+
+    def __init__(self, name: str, field: str, projection: dict = None, collation=None, normalize=None):
+        self.name = name
+        self.field = field
+        self.projection = projection
+        self.collation = collation
+        self.normalize = normalize or (lambda value: value)
+        self._loop = None
+        self._batch = {}  # key -> (value, future), sent at the end of the current tick
+        self._in_flight = {}  # key -> future of a query already sent
+        self._tasks = set()  # asyncio keeps only weak references to running tasks
+        LOADERS.append(self)
+
+    async def load(self, value) -> Optional[dict]:
+        """Returns the user whose field equals `value` (None if there is none)."""
+        key = self.normalize(value)
+        memo = user_memo_var.get()
+        if memo is not None and (self.name, key) in memo:
+            user = memo[(self.name, key)]
+        else:
+            # Shielded: a cancelled caller must not cancel a query other callers are waiting for
+            user = await asyncio.shield(self._future(key, value))
+            if memo is not None:
+                memo[(self.name, key)] = user
+        # Hand out a copy so callers cannot alter what other callers receive
+        return dict(user) if user is not None else None
+
+    def forget(self):
+        """Makes the next lookups send a new query instead of joining one already in flight."""
+        self._in_flight.clear()
+
+    def _future(self, key, value) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # Futures belong to one event loop
+            self._loop, self._batch, self._in_flight, self._tasks = loop, {}, {}, set()
+
+        if key in self._batch:
+            return self._batch[key][1]
+        future = self._in_flight.get(key)
+        if future is None:
+            if not self._batch:
+                loop.call_soon(self._dispatch)
+            future = loop.create_future()
+            self._batch[key] = (value, future)
+        return future
+
+    def _dispatch(self):
+        batch, self._batch = self._batch, {}
+        keys = list(batch)
+        for start in range(0, len(keys), USER_LOADER_MAX_BATCH):
+            chunk = {key: batch[key] for key in keys[start:start + USER_LOADER_MAX_BATCH]}
+            for key, (_, future) in chunk.items():
+                self._in_flight[key] = future
+            task = self._loop.create_task(self._fetch(chunk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, chunk: dict):
+        USER_LOADER_BATCH_SIZE.labels(self.name).observe(len(chunk))
+        try:
+            query = not_deleted({self.field: {"$in": [value for value, _ in chunk.values()]}})
+            cursor = db.users.find(query, self.projection, collation=self.collation)
+            users = {self.normalize(user[self.field]): user async for user in cursor}
+        except Exception as e:
+            users, error = {}, e
+        else:
+            error = None
+
+        for key, (_, future) in chunk.items():
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(users.get(key))
+
+
+def forget_users():
+    """Drops memoized and in-flight lookups after a write, so later reads see the new state."""
+    memo = user_memo_var.get()
+    if memo:
+        memo.clear()
+    for loader in LOADERS:
+        loader.forget()
+
+
+# Fields every caller of `users_by_id` needs (principal, profile and token_version), so lookups
+# from different callers can share one query without fetching whole documents
+USER_FIELDS = {"_id": 1, "name": 1, "email": 1, "role": 1, "created": 1, "created_at": 1, "token_version": 1}
+
+# Profiles by ID
+users_by_id = UserLoader("users_by_id", "_id", projection=USER_FIELDS)
+# Full documents by email, matched case-insensitively like the unique email index
+users_by_email = UserLoader("users_by_email", "email", collation=EMAIL_COLLATION, normalize=lambda email: email.casefold())
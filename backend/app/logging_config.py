@@ -0,0 +1,143 @@
+"""
+Application logging setup.
+
+Handlers never run on the event loop: log calls only enqueue the record, and a
+background listener thread formats it (JSON by default) and writes it to the
+console and a size-rotated log file (console only when app.serve runs several
+workers, since each worker would rotate the same file). High-volume success logs can be sampled
+per route with LOG_SAMPLE_RATES.
+"""
+
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
+LOG_FILE = os.getenv("LOG_FILE", "app.log")  # empty to log to the console only
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Sampling of successful access logs, e.g. "GET /api/users/{user_id}=0.1,GET /api/users=0.5"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# ID of the request being handled; attached to every record logged while handling it
+request_id_var = ContextVar("request_id", default=None)
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of successful access logs for the configured routes.
+
+    Applies to records logged with `extra={"route": ..., "method": ..., "status_code": ...}`;
+    warnings, errors and non-2xx/3xx responses are always kept.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        route = getattr(record, "route", None)
+        if route is None or record.levelno > logging.INFO or getattr(record, "status_code", 200) >= 400:
+            return True
+        rate = self.rates.get(f"{getattr(record, 'method', '')} {route}")
+        return rate is None or random.random() < rate
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request ID (if any) to the record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        if request_id is not None:
+            record.request_id = request_id
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queues records without formatting them; drops records when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record  # Formatting happens on the listener thread
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def parse_sample_rates(value: str) -> dict:
+    """Parses "METHOD /route=rate" pairs separated by commas."""
+    rates = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        key, rate = item.rsplit("=", 1)
+        rates[key.strip()] = float(rate)
+    return rates
+
+def setup_logging(log_file: str = None):
+    """Routes every log record through the background listener (safe to call more than once)."""
+    global _listener
+    if _listener is not None:
+        return
+    log_file = LOG_FILE if log_file is None else log_file
+
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
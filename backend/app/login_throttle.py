@@ -0,0 +1,181 @@
+"""
+Per-account and per-IP throttling of failed sign-ins.
+
+Failures are counted per email and per client IP. Past a number of free attempts,
+each further failure locks the key for an exponentially growing delay (capped),
+and locked keys are rejected with 429 before the user lookup and bcrypt run.
+Every attempt is counted as a failure before the password is checked, so
+concurrent attempts cannot all pass the check before any of them is recorded;
+a successful sign-in gives the slot back and resets the email's counter.
+Counters expire `LOGIN_THROTTLE_WINDOW` seconds after the last failure.
+
+State lives in a bounded in-process LRU by default; with RATE_LIMIT_STORAGE=mongo
+(or LOGIN_THROTTLE_STORAGE=mongo) counters are shared through the `login_failures`
+collection. Known locks are also cached locally, so rejecting an ongoing attack
+costs a dictionary lookup.
+"""
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, timezone
+from app.database import db
+from app.metrics import RATE_LIMITED_REQUESTS
+from app.utils.cache import TTLCache
+import hashlib
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Disabled by default in tests
+LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "false" if os.getenv("TEST_ENV") == "true" else "true").lower() == "true"
+LOGIN_THROTTLE_STORAGE = os.getenv("LOGIN_THROTTLE_STORAGE", os.getenv("RATE_LIMIT_STORAGE", "memory"))  # memory or mongo
+LOGIN_THROTTLE_EMAIL_ATTEMPTS = int(os.getenv("LOGIN_THROTTLE_EMAIL_ATTEMPTS", 5))  # free failures per email
+LOGIN_THROTTLE_IP_ATTEMPTS = int(os.getenv("LOGIN_THROTTLE_IP_ATTEMPTS", 20))  # free failures per IP
+LOGIN_THROTTLE_BASE_DELAY = float(os.getenv("LOGIN_THROTTLE_BASE_DELAY", 1))  # seconds, doubled on every further failure
+LOGIN_THROTTLE_MAX_DELAY = float(os.getenv("LOGIN_THROTTLE_MAX_DELAY", 900))
+LOGIN_THROTTLE_WINDOW = float(os.getenv("LOGIN_THROTTLE_WINDOW", 900))  # seconds before failures are forgotten
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", 100000))
+LOGIN_THROTTLE_RETRIES = 5  # compare-and-set attempts per key with the shared store
+
+ERROR_429_MESSAGE = "Too many failed sign-in attempts. Try again later."
+
+# key -> (failures, locked_until as a wall-clock timestamp)
+LOGIN_FAILURES = TTLCache("login_failures", maxsize=LOGIN_THROTTLE_MAX_KEYS, ttl=LOGIN_THROTTLE_WINDOW)
+
+
+def throttle_keys(email: str, ip: str) -> list:
+    """Returns the (key, free attempts) pairs tracked for a sign-in."""
+    email_digest = hashlib.sha256(email.lower().encode()).hexdigest()  # Avoids keeping addresses in memory
+    return [(f"email:{email_digest}", LOGIN_THROTTLE_EMAIL_ATTEMPTS), (f"ip:{ip}", LOGIN_THROTTLE_IP_ATTEMPTS)]
+
+def lock_delay(failures: int, free_attempts: int) -> float:
+    """Seconds a key stays locked after its `failures`-th failure (0 while within the free attempts)."""
+    if failures <= free_attempts:
+        return 0.0
+    return min(LOGIN_THROTTLE_BASE_DELAY * 2 ** (failures - free_attempts - 1), LOGIN_THROTTLE_MAX_DELAY)
+
+async def ensure_login_throttle_indexes():
+    """Creates the TTL index that expires failure counters (only with the shared store)."""
+    if LOGIN_THROTTLE_STORAGE == "mongo":
+        await db.login_failures.create_index("exp", expireAfterSeconds=0)
+
+
+def reject_login(retry_after: float):
+    RATE_LIMITED_REQUESTS.labels("login_throttle").inc()
+    raise HTTPException(
+        status_code=429,
+        detail=ERROR_429_MESSAGE,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+def counted_failure(failures: int, free_attempts: int, now: float) -> dict:
+    """State of a key once one more failure is counted."""
+    delay = lock_delay(failures + 1, free_attempts)
+    return {
+        "failures": failures + 1,
+        "locked_until": now + delay if delay else 0,
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=max(LOGIN_THROTTLE_WINDOW, delay)),
+    }
+
+async def reserve_slot(key: str, free_attempts: int, now: float) -> tuple:
+    """Counts an attempt on `key` unless it is locked; returns (key, failures, locked_until) from before."""
+    failures, locked_until = LOGIN_FAILURES.get(key, (0, 0))
+    if locked_until > now:
+        reject_login(locked_until - now)
+
+    if LOGIN_THROTTLE_STORAGE == "mongo":
+        # Compare-and-set on the failure count: concurrent attempts each take a distinct slot
+        for _ in range(LOGIN_THROTTLE_RETRIES):
+            state = await db.login_failures.find_one({"_id": key})
+            failures, locked_until = (state["failures"], state.get("locked_until", 0)) if state else (0, 0)
+            if locked_until > now:
+                LOGIN_FAILURES.set(key, (failures, locked_until), ttl=locked_until - now)
+                reject_login(locked_until - now)
+
+            counted = counted_failure(failures, free_attempts, now)
+            try:
+                if state is None:
+                    await db.login_failures.insert_one({"_id": key, **counted})
+                    break
+                result = await db.login_failures.update_one({"_id": key, "failures": failures}, {"$set": counted})
+                if result.modified_count:
+                    break
+            except DuplicateKeyError:
+                pass
+        else:
+            reject_login(1)  # Too many attempts racing on the same key
+    else:
+        counted = counted_failure(failures, free_attempts, now)
+
+    LOGIN_FAILURES.set(key, (counted["failures"], counted["locked_until"]), ttl=max(LOGIN_THROTTLE_WINDOW, counted["locked_until"] - now))
+    return key, failures, locked_until
+
+async def release_slot(key: str, failures: int, locked_until: float):
+    """Gives back a slot taken by `reserve_slot`, restoring the lock from before if nothing else changed."""
+    now = time.time()
+    ttl = max(LOGIN_THROTTLE_WINDOW, locked_until - now)
+    if LOGIN_THROTTLE_STORAGE == "mongo":
+        result = await db.login_failures.update_one(
+            {"_id": key, "failures": failures + 1},
+            {"$set": {"failures": failures, "locked_until": locked_until, "exp": datetime.now(timezone.utc) + timedelta(seconds=ttl)}},
+        )
+        if not result.modified_count:  # Other attempts were counted since; only take ours back
+            await db.login_failures.update_one({"_id": key, "failures": {"$gt": 0}}, {"$inc": {"failures": -1}})
+        LOGIN_FAILURES.delete(key)  # Re-read from the shared store on the next lock
+        return
+
+    current_failures, current_locked_until = LOGIN_FAILURES.get(key, (0, 0))
+    if current_failures == failures + 1:
+        LOGIN_FAILURES.set(key, (failures, locked_until), ttl=ttl)
+    elif current_failures:
+        LOGIN_FAILURES.set(key, (current_failures - 1, current_locked_until), ttl=max(LOGIN_THROTTLE_WINDOW, current_locked_until - now))
+
+
+async def reserve_login_attempt(email: str, ip: str) -> list:
+    """
+    Counts a sign-in attempt as a failure of the email and the IP before the password is checked.
+
+    Raises 429 (with Retry-After) if either is locked. Returns the reservation, which
+    `record_login_success` gives back; a failed attempt simply keeps it, and an attempt
+    that errors out (database or hash pool) gives it back with `release_login_attempt`.
+    """
+    if not LOGIN_THROTTLE_ENABLED:
+        return []
+
+    now = time.time()
+    reservation = []
+    try:
+        for key, free_attempts in throttle_keys(email, ip):
+            reservation.append(await reserve_slot(key, free_attempts, now))
+    except HTTPException:
+        await release_login_attempt(reservation)
+        raise
+    return reservation
+
+async def release_login_attempt(reservation: list):
+    """Gives back every slot of a reservation, for attempts that ended before the password was checked."""
+    for slot in reservation:
+        await release_slot(*slot)
+
+def record_login_failure(reservation: list):
+    """Logs the keys a failed sign-in locked (the failure itself was counted by the reservation)."""
+    now = time.time()
+    for key, _, _ in reservation:
+        failures, locked_until = LOGIN_FAILURES.get(key, (0, 0))
+        if locked_until > now:
+            logger.warning("Sign-in throttled - Key: %s - Failures: %s - Locked for: %.0fs", key.split(":")[0], failures, locked_until - now)
+
+async def record_login_success(reservation: list):
+    """Resets the failure counter of the email and gives the IP its slot back (the IP counter keeps running)."""
+    if not reservation:
+        return
+
+    (email_key, _, _), *others = reservation
+    LOGIN_FAILURES.delete(email_key)
+    if LOGIN_THROTTLE_STORAGE == "mongo":
+        await db.login_failures.delete_one({"_id": email_key})
+    for slot in others:
+        await release_slot(*slot)
@@ -1,9 +1,19 @@
 import logging
-from fastapi import FastAPI, Request, HTTPException, status, Depends
+from fastapi import FastAPI, HTTPException, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime, timezone
-from app.routes import users, auth
-from app.security import get_current_user
+from contextlib import asynccontextmanager
+from app.routes import users, auth, bulk
+from app.security import get_current_user, shutdown_hash_executor
+from app.revocation import ensure_revocation_indexes
+from app.utils.rate_limiter import ensure_rate_limit_indexes
+from app.login_throttle import ensure_login_throttle_indexes
+from app.refresh_tokens import ensure_refresh_token_indexes
+from app.soft_delete import start_purge_task, stop_purge_task
+from app.database import connect_to_mongo, close_mongo_connection, ensure_indexes
+from app.metrics import metrics_response
+from app.middleware import RequestContextMiddleware
+from app.utils.cache import CACHES
+from app.logging_config import setup_logging
 from fastapi.openapi.utils import get_openapi
 from dotenv import load_dotenv
 import os
@@ -15,18 +25,26 @@ load_dotenv()
 # Get values from .env
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Log to file
-        logging.StreamHandler()  # Log to console
-    ]
-)
+# Configure Logging (queued to a background thread, see app.logging_config)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks."""
+    await connect_to_mongo()
+    await ensure_indexes()
+    await ensure_revocation_indexes()
+    await ensure_rate_limit_indexes()
+    await ensure_login_throttle_indexes()
+    await ensure_refresh_token_indexes()
+    start_purge_task()
+    yield
+    await stop_purge_task()
+    shutdown_hash_executor()
+    close_mongo_connection()
+
 # Initialize FastAPI App with Swagger Metadata
 app = FastAPI(
     title="FARM Skeleton Backend",
@@ -34,7 +52,8 @@ app = FastAPI(
     version="1.0",
     docs_url="/docs",  # Swagger UI
     redoc_url="/redoc",  # Redoc UI
-    openapi_url="/openapi.json"  # OpenAPI JSON spec
+    openapi_url="/openapi.json",  # OpenAPI JSON spec
+    lifespan=lifespan
 )
 
 # CORS Middleware Configuration
@@ -44,24 +63,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Request-ID"],  # Headers readable by the frontend
 )
 
-# Attach Routes
+# Request timing, metrics, request IDs and access logging (outermost middleware)
+app.add_middleware(RequestContextMiddleware)
+
+# Attach Routes (bulk first so /api/users/export is not captured by /api/users/{user_id})
+app.include_router(bulk.router, prefix="/api", tags=["Users"])
 app.include_router(users.router, prefix="/api", tags=["Users"])
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Middleware to log all incoming requests."""
-    start_time = datetime.now(timezone.utc)
-    response = await call_next(request)
-    duration = (datetime.now(timezone.utc) - start_time).total_seconds()
-
-    logger.info(
-        f"Request: {request.method} {request.url} | Status: {response.status_code} | Duration: {duration:.2f}s"
-    )
-    return response
-
 @app.get("/", tags=["General"])
 async def home():
     """Root endpoint of the API.
@@ -72,6 +84,22 @@ async def home():
     logger.info("Home endpoint accessed")
     return {"message": "Welcome to the FARM Skeleton Backend"}
 
+@app.get("/stats/cache", tags=["General"])
+async def cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss/eviction counters of the in-process caches.
+
+    Requires:
+        Admin role.
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden: Access denied")
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format."""
+    return metrics_response()
+
 # Custom OpenAPI Schema
 def custom_openapi():
     if app.openapi_schema:
@@ -0,0 +1,115 @@
+"""
+Prometheus metrics, served in text format at /metrics.
+
+Metrics live in the default prometheus_client registry. When running several
+workers, point PROMETHEUS_MULTIPROC_DIR at an empty, writable directory (before
+the app starts) and /metrics aggregates the values of every worker.
+"""
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+from app.utils.cache import CACHES
+import os
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency as reported by the driver.",
+    ["command", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds",
+    "Password hash/verify latency, including time queued for a worker.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2.5, 5, 10),
+)
+USER_LOADER_BATCH_SIZE = Histogram(
+    "user_loader_batch_size",
+    "Keys resolved by one batched user lookup query.",
+    ["loader"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "rate_limited_requests_total",
+    "Requests rejected with 429 by a rate limit policy.",
+    ["policy"],
+)
+
+# Label used for requests that did not match any route (keeps label cardinality bounded)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records the duration of every MongoDB command."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_LATENCY.labels(event.command_name, "success").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_LATENCY.labels(event.command_name, "failure").observe(event.duration_micros / 1e6)
+
+
+class CacheCollector:
+    """Exposes the counters of every in-process cache (per worker, see `CACHES`)."""
+
+    def collect(self):
+        size = GaugeMetricFamily("cache_entries", "Entries held by an in-process cache.", labels=["cache"])
+        counters = {
+            name: CounterMetricFamily(f"cache_{name}", f"In-process cache {name}.", labels=["cache"])
+            for name in ("hits", "misses", "evictions", "expirations")
+        }
+        for cache_name, cache in CACHES.items():
+            stats = cache.stats()
+            size.add_metric([cache_name], stats["size"])
+            for name, family in counters.items():
+                family.add_metric([cache_name], stats[name])
+        yield size
+        yield from counters.values()
+
+
+CACHE_COLLECTOR = CacheCollector()
+REGISTRY.register(CACHE_COLLECTOR)
+
+
+def route_template(scope: dict) -> str:
+    """Returns the path template of the matched route (e.g. /api/users/{user_id})."""
+    # Newer FastAPI versions keep the router prefix on the effective route context only
+    fastapi_scope = scope.get("fastapi")
+    effective_route = fastapi_scope.get("effective_route_context") if isinstance(fastapi_scope, dict) else None
+    route = effective_route or scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+def metrics_response() -> Response:
+    """Renders every metric in the Prometheus text format."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(CACHE_COLLECTOR)  # Caches of the worker serving the scrape
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,72 @@
+"""
+Pure ASGI middleware for request timing, request-id propagation and access logging.
+
+Unlike `@app.middleware("http")` (Starlette's BaseHTTPMiddleware), it does not
+spawn a task or buffer the response through a memory stream per request, and it
+passes streaming responses through untouched.
+"""
+
+from app.logging_config import request_id_var
+from app.loaders import USER_LOADER_MEMO, user_memo_var
+from app.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, route_template
+import logging
+import re
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Client-supplied request IDs are only propagated if they look sane
+_VALID_REQUEST_ID = re.compile(rb"^[A-Za-z0-9._\-]{1,128}$")
+
+
+class RequestContextMiddleware:
+    """Times each request, records metrics, propagates `X-Request-ID` and writes the access log."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER and _VALID_REQUEST_ID.match(value):
+                request_id = value.decode()
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        scope.setdefault("state", {})["request_id"] = request_id  # Available as request.state.request_id
+        token = request_id_var.set(request_id)
+        memo_token = user_memo_var.set({} if USER_LOADER_MEMO else None)  # Users loaded by this request
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode())]
+            await send(message)
+
+        method = scope["method"]
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            in_flight.dec()
+            duration = time.perf_counter() - start_time
+            route = route_template(scope)
+            REQUEST_LATENCY.labels(method, route, status_code).observe(duration)
+
+            logger.info(
+                "Request: %s %s | Status: %s | Duration: %.2fms", method, scope["path"], status_code, duration * 1000,
+                extra={"method": method, "route": route, "status_code": status_code, "duration_ms": round(duration * 1000, 2)},
+            )
+            user_memo_var.reset(memo_token)
+            request_id_var.reset(token)
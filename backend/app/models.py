@@ -3,7 +3,7 @@ Pydantic models for User data validation.
 """
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import re
 
@@ -92,9 +92,64 @@ class UserResponse(BaseModel):
     email: EmailStr
     created_at: datetime
 
+class UserBatchResponse(BaseModel):
+    found: List[UserResponse]
+    missing: List[str]  # IDs of users that do not exist
+    forbidden: List[str]  # IDs of existing users the caller may not read
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1, max_length=256, description="Refresh token from the last signin or refresh")
+
+class SignOutRequest(BaseModel):
+    refresh_token: Optional[str] = Field(None, max_length=256, description="Refresh token to revoke with the access token")
 
 class LogoutResponse(BaseModel):
     message: str
+
+
+# Pydantic Models for Bulk Import
+class ImportRowResult(BaseModel):
+    row: int  # Zero-based position in the uploaded body
+    status: str  # created, duplicate, invalid or error
+    id: Optional[str] = None
+    email: Optional[str] = None
+    errors: Optional[List[str]] = None
+
+class ImportResponse(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    failed: int
+    results: List[ImportRowResult]
+
+
+# Pydantic Models for Bulk Update / Delete
+class BulkUserFilter(BaseModel):
+    role: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class BulkUserChanges(BaseModel):
+    name: Optional[str] = None
+    role: Optional[str] = None
+
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=1000, description="User IDs to target (max 1000)")
+    filter: Optional[BulkUserFilter] = Field(None, description="Target every user matching the filter instead of `ids`")
+
+class BulkUpdateRequest(BulkDeleteRequest):
+    update: BulkUserChanges
+
+class BulkRowResult(BaseModel):
+    id: str
+    status: str  # updated, deleted, not_found or invalid_id
+
+class BulkResponse(BaseModel):
+    matched: int
+    modified: int
+    results: List[BulkRowResult]  # Per-id outcomes (empty when targeting a filter)
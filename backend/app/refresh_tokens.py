@@ -0,0 +1,106 @@
+"""
+Rotating refresh tokens.
+
+A refresh token is "<id>.<secret>". Only the SHA-256 digest of the secret is stored
+(a fast digest is enough for 256-bit random secrets; bcrypt is for low-entropy
+passwords), in the `refresh_tokens` collection keyed by id, with a TTL index on
+the expiry. Every refresh replaces the token with a new one from the same family;
+presenting a token that was already rotated revokes the whole family, since it
+means the token leaked. A token rotated less than REFRESH_TOKEN_REUSE_GRACE seconds
+ago is the exception: that is a concurrent refresh (two tabs renewing at once), so
+it gets a sibling token of the same family instead.
+"""
+
+from fastapi import HTTPException
+from datetime import datetime, timedelta, timezone
+from app.database import db
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import uuid
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+REFRESH_TOKEN_REUSE_GRACE = float(os.getenv("REFRESH_TOKEN_REUSE_GRACE", 10))  # seconds; 0 treats every reuse as a leak
+
+ERROR_401_INVALID_REFRESH_TOKEN = "Invalid refresh token"
+
+
+def _digest(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+def _rotated_within_grace(stored: dict) -> bool:
+    rotated_at = stored.get("rotated_at")
+    return bool(rotated_at) and (
+        datetime.now(timezone.utc) - rotated_at.replace(tzinfo=timezone.utc)
+    ).total_seconds() < REFRESH_TOKEN_REUSE_GRACE
+
+async def ensure_refresh_token_indexes():
+    """Creates the TTL index that deletes refresh tokens once they expire, and the per-user index."""
+    await db.refresh_tokens.create_index("exp", expireAfterSeconds=0)
+    await db.refresh_tokens.create_index("user_id")
+
+async def issue_refresh_token(user_id, family: str = None, token_id: str = None) -> str:
+    """Stores a new refresh token for the user (in a new family unless one is given) and returns it."""
+    token_id = token_id or uuid.uuid4().hex
+    secret = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.refresh_tokens.insert_one({
+        "_id": token_id,
+        "user_id": user_id,
+        "family": family or token_id,
+        "hash": _digest(secret),
+        "created": now,
+        "exp": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "replaced_by": None,
+    })
+    return f"{token_id}.{secret}"
+
+async def find_refresh_token(token: str) -> dict:
+    """Returns the stored token matching `token`, or raises 401."""
+    token_id, _, secret = token.partition(".")
+    stored = await db.refresh_tokens.find_one({"_id": token_id}) if secret else None
+    if (
+        not stored
+        or not hmac.compare_digest(stored["hash"], _digest(secret))
+        or stored["exp"].replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc)
+    ):
+        raise HTTPException(status_code=401, detail=ERROR_401_INVALID_REFRESH_TOKEN)
+    return stored
+
+async def rotate_refresh_token(token: str) -> tuple:
+    """
+    Exchanges a refresh token for a new one of the same family.
+
+    Returns (user_id, new refresh token). Reusing a rotated token revokes its family,
+    unless it was rotated within the grace window.
+    """
+    stored = await find_refresh_token(token)
+    new_id = uuid.uuid4().hex
+
+    # Only one request can rotate a token; the loser is a concurrent refresh or a reuse
+    rotated = await db.refresh_tokens.find_one_and_update(
+        {"_id": stored["_id"], "replaced_by": None},
+        {"$set": {"replaced_by": new_id, "rotated_at": datetime.now(timezone.utc)}},
+    )
+    if rotated is None:
+        current = await db.refresh_tokens.find_one({"_id": stored["_id"]})
+        if current and _rotated_within_grace(current):
+            return stored["user_id"], await issue_refresh_token(stored["user_id"], family=stored["family"])
+
+        await revoke_refresh_family(stored["family"])
+        logger.warning("Refresh token reuse detected - Family revoked - User ID: %s", stored["user_id"])
+        raise HTTPException(status_code=401, detail=ERROR_401_INVALID_REFRESH_TOKEN)
+
+    return stored["user_id"], await issue_refresh_token(stored["user_id"], family=stored["family"], token_id=new_id)
+
+async def revoke_refresh_family(family: str):
+    """Revokes every token descending from the same signin."""
+    await db.refresh_tokens.delete_many({"family": family})
+
+async def revoke_user_refresh_tokens(user_ids):
+    """Revokes every refresh token of the given users (password change, deletion)."""
+    await db.refresh_tokens.delete_many({"user_id": {"$in": list(user_ids)}})
@@ -0,0 +1,42 @@
+"""
+Opt-in fast JSON responses (FAST_RESPONSES=true).
+
+Routes keep their `response_model` (so the OpenAPI schema is unchanged) but, in
+fast mode, return an orjson-rendered response directly. FastAPI then skips its
+own validation and serialization pass over the returned models.
+"""
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+import orjson
+import os
+
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "false").lower() == "true"
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (UTC datetimes end in "Z", like Pydantic)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def model_response(content, status_code: int = 200, response: Response = None):
+    """
+    Returns `content` (a model or a list of models) unchanged, or, in fast mode,
+    pre-serialized with orjson. Headers set on the injected `response` are kept.
+    """
+    if not FAST_RESPONSES:
+        return content
+
+    if isinstance(content, list):
+        payload = [item.model_dump() for item in content]
+    else:
+        payload = content.model_dump()
+
+    fast_response = ORJSONResponse(payload, status_code=status_code)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != "content-length":
+                fast_response.headers[name] = value
+    return fast_response
@@ -0,0 +1,56 @@
+"""
+Revoked access tokens, keyed by the token's `jti` claim.
+
+Revocations are stored in the `revoked_tokens` collection with a TTL index on the
+token's expiry, so MongoDB prunes them once the token could no longer be used anyway.
+A small local cache sits in front of the collection: revoked entries are kept until
+the token expires, and "not revoked" answers for `REVOCATION_CACHE_TTL` seconds,
+which bounds how long a revocation made on another worker takes to apply here.
+"""
+
+from datetime import datetime, timezone
+from app.database import db
+from app.utils.cache import TTLCache
+import os
+
+REVOCATION_CACHE_SIZE = int(os.getenv("REVOCATION_CACHE_SIZE", 10000))
+REVOCATION_CACHE_TTL = float(os.getenv("REVOCATION_CACHE_TTL", 10))
+
+REVOCATION_CACHE = TTLCache("revoked_tokens", maxsize=REVOCATION_CACHE_SIZE, ttl=REVOCATION_CACHE_TTL)
+
+
+def _seconds_until(expires_at: datetime) -> float:
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+async def ensure_revocation_indexes():
+    """Creates the TTL index that expires revocations together with their tokens."""
+    await db.revoked_tokens.create_index("exp", expireAfterSeconds=0)
+
+async def revoke_token(jti: str, expires_at: datetime):
+    """Marks a token as revoked until it expires."""
+    remaining = _seconds_until(expires_at)
+    if remaining <= 0:
+        return  # Already unusable, nothing to store
+
+    await db.revoked_tokens.update_one(
+        {"_id": jti},
+        {"$setOnInsert": {"exp": expires_at, "revoked_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    # Invalidate first so a concurrent lookup cannot cache a stale "not revoked"
+    REVOCATION_CACHE.delete(jti)
+    REVOCATION_CACHE.set(jti, True, ttl=remaining)
+
+async def is_token_revoked(jti: str, expires_at: datetime) -> bool:
+    """Checks whether a token has been revoked, consulting the local cache first."""
+    revoked = REVOCATION_CACHE.get(jti)
+    if revoked is not None:
+        return revoked
+
+    generation = REVOCATION_CACHE.generation
+    revoked = await db.revoked_tokens.find_one({"_id": jti}, {"_id": 1}) is not None
+
+    remaining = _seconds_until(expires_at)
+    ttl = remaining if revoked else min(REVOCATION_CACHE_TTL, remaining)
+    REVOCATION_CACHE.set(jti, revoked, ttl=ttl, generation=generation)
+    return revoked
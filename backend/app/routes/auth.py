@@ -2,31 +2,26 @@
 Authentication routes for user sign-in and JWT token generation.
 """
 import logging
-from fastapi import APIRouter, HTTPException, Request, Depends
-from app.database import db
-from app.security import verify_password, create_access_token, check_csrf, get_current_user, invalidate_token
-from app.models import SignInRequest, TokenResponse, LogoutResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Depends
+from app.security import (
+    verify_password_async, password_needs_update, rehash_password,
+    access_token_claims, create_access_token, check_csrf, get_current_user, invalidate_token,
+)
+from app.login_throttle import reserve_login_attempt, release_login_attempt, record_login_failure, record_login_success
+from app.models import SignInRequest, TokenResponse, LogoutResponse, RefreshRequest, SignOutRequest
+from app.loaders import users_by_id, users_by_email
+from app.refresh_tokens import issue_refresh_token, rotate_refresh_token, find_refresh_token, revoke_refresh_family
+from bson import ObjectId
+from typing import Optional
+from app.utils.rate_limiter import rate_limit
 
 router = APIRouter()
 
-# Store revoked tokens (Temporary In-Memory Storage for demonstration)
-REVOKED_TOKENS = set()
-
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Log to file
-        logging.StreamHandler()  # Log to console
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
 
-@router.post("/signin", response_model=TokenResponse, tags=["Authentication"], summary="User Sign-In")
-async def signin(request: Request, form_data: SignInRequest):
+@router.post("/signin", response_model=TokenResponse, dependencies=[Depends(rate_limit("signin"))], tags=["Authentication"], summary="User Sign-In")
+async def signin(request: Request, form_data: SignInRequest, background_tasks: BackgroundTasks):
     """
     Authenticates a user and returns a JWT token.
 
@@ -39,23 +34,59 @@ async def signin(request: Request, form_data: SignInRequest):
     password = form_data.password
 
     if not email or not password:
-        logger.warning(f"Signin attempt failed: Missing credentials - IP: {request.client.host}")
+        logger.warning("Signin attempt failed: Missing credentials - IP: %s", request.client.host)
         raise HTTPException(status_code=400, detail="Email and password are required")
 
-    user = await db.users.find_one({"email": email})
-    if not user or not verify_password(password, user["password"]):
-        logger.warning(f"Failed login attempt for email: {email} - IP: {request.client.host}")
+    # Locked emails/IPs are rejected before the user lookup and bcrypt; otherwise the attempt
+    # counts as a failure until the password is verified
+    reservation = await reserve_login_attempt(email, request.client.host)
+
+    try:
+        user = await users_by_email.load(email)
+        valid = bool(user) and await verify_password_async(password, user["password"])
+    except Exception:
+        # A failed lookup or a busy hash pool (503) says nothing about the credentials
+        await release_login_attempt(reservation)
+        raise
+    if not valid:
+        logger.warning("Failed login attempt for email: %s - IP: %s", email, request.client.host)
+        record_login_failure(reservation)
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    await record_login_success(reservation)
+
+    # Hashes made with an older scheme or cost are upgraded after the response is sent
+    if password_needs_update(user["password"]):
+        background_tasks.add_task(rehash_password, user["_id"], user["password"], password)
+
+    access_token = create_access_token(data=access_token_claims(user))
+    refresh_token = await issue_refresh_token(user["_id"])
+
+    logger.info("User signed in: %s - IP: %s", email, request.client.host)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=TokenResponse, dependencies=[Depends(rate_limit("refresh"))], tags=["Authentication"], summary="Refresh Access Token")
+async def refresh(request: Request, body: RefreshRequest):
+    """
+    Exchanges a refresh token for a new access token and a new refresh token.
+
+    - **Requires:** A refresh token from `/auth/signin` or a previous refresh (each one works once)
+    - **Returns:** A new JWT token and refresh token, without re-checking the password
+    """
+    check_csrf(request)
 
-    access_token = create_access_token(data={"sub": str(user["_id"])})
+    user_id, refresh_token = await rotate_refresh_token(body.refresh_token.strip())
+    user = await users_by_id.load(ObjectId(user_id))
+    if not user:
+        logger.warning("Token refresh failed: User not found - User ID: %s", user_id)
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    logger.info(f"User signed in: {email} - IP: {request.client.host}")
-    return {"access_token": access_token, "token_type": "bearer"}
+    access_token = create_access_token(data=access_token_claims(user))
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
-@router.post("/signout", response_model=LogoutResponse, tags=["Authentication"], summary="User Sign-Out")
-async def signout(request: Request, current_user: dict = Depends(get_current_user)):
+@router.post("/signout", response_model=LogoutResponse, dependencies=[Depends(rate_limit("write"))], tags=["Authentication"], summary="User Sign-Out")
+async def signout(request: Request, body: Optional[SignOutRequest] = None, current_user: dict = Depends(get_current_user)):
     """
-    Logs out a user by revoking their JWT token.
+    Logs out a user by revoking their JWT token (and refresh token, if given).
 
     - **Requires:** Authentication token in header
     - **Ensures:** Token cannot be reused (prevents replay attacks)
@@ -64,16 +95,20 @@ async def signout(request: Request, current_user: dict = Depends(get_current_use
 
     token = request.headers.get("Authorization")
     if not token or not token.startswith("Bearer "):
-        logger.warning(f"Signout attempt failed: No token provided - User: {current_user['email']}")
+        logger.warning("Signout attempt failed: No token provided - User: %s", current_user['email'])
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    # Replayed (already revoked) tokens are rejected by get_current_user
     token = token.split(" ")[1]
-    if token in REVOKED_TOKENS:
-        logger.warning(f"Replay attack detected for token: {token} - User: {current_user['email']}")
-        raise HTTPException(status_code=401, detail="Invalid token")
+    await invalidate_token(token)
 
-    invalidate_token(token)
-    REVOKED_TOKENS.add(token)
+    if body and body.refresh_token:
+        try:
+            stored = await find_refresh_token(body.refresh_token.strip())
+        except HTTPException:
+            stored = None  # Already expired or revoked
+        if stored and str(stored["user_id"]) == str(current_user["_id"]):
+            await revoke_refresh_family(stored["family"])
 
-    logger.info(f"User signed out: {current_user['email']}")
+    logger.info("User signed out: %s", current_user['email'])
     return {"message": "Signed out successfully"}
\ No newline at end of file
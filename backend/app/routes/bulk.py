@@ -0,0 +1,352 @@
+"""
+Admin-only bulk operations on users (export, import, update, delete).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from typing import Optional
+from app.database import db
+from app.models import UserCreate, ImportResponse, BulkUpdateRequest, BulkDeleteRequest, BulkResponse
+from app.routes.users import new_user_document, user_update_operations, validate_name, invalidate_user_counts
+from app.security import get_current_user, hash_passwords_async, invalidate_principals, invalidate_all_principals
+from app.refresh_tokens import revoke_user_refresh_tokens
+from app.soft_delete import delete_users, not_deleted, release_emails
+from app.utils.rate_limiter import rate_limit
+from bson import ObjectId
+from datetime import datetime, timezone
+import csv
+import io
+import json
+import logging
+import os
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+ERROR_403_FORBIDDEN_ACCESS_MESSAGE = "Forbidden: Access denied"
+
+# Fields that may be exported (never the password hash)
+EXPORT_FIELDS = ["id", "name", "email", "role", "created", "updated"]
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Rows hashed and inserted together during an import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+
+
+# **Helper Functions**
+def require_admin(current_user: dict, action: str):
+    """Rejects non-admin users."""
+    if current_user["role"] != "admin":
+        logger.warning("Unauthorized %s attempt by: %s", action, current_user['email'])
+        raise HTTPException(status_code=403, detail=ERROR_403_FORBIDDEN_ACCESS_MESSAGE)
+
+def parse_export_fields(fields: Optional[str]) -> list:
+    """Validates the comma-separated list of exported fields."""
+    if not fields:
+        return EXPORT_FIELDS
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in EXPORT_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Invalid export fields. Allowed: {', '.join(EXPORT_FIELDS)}")
+    return selected
+
+def export_row(user: dict, fields: list) -> dict:
+    """Maps a user document to an export row."""
+    row = {}
+    for field in fields:
+        value = user.get("_id" if field == "id" else field)
+        if field == "id":
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        row[field] = value
+    return row
+
+def format_rows(rows: list, fields: list, export_format: str) -> str:
+    """Serializes a batch of rows as NDJSON lines or CSV records."""
+    if export_format == "ndjson":
+        return "".join(json.dumps(row) + "\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+async def stream_users(query: dict, fields: list, export_format: str):
+    """Yields the export one cursor batch at a time, so memory stays flat."""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(fields)
+        yield buffer.getvalue()
+
+    projection = {("_id" if field == "id" else field): 1 for field in fields}
+    projection.setdefault("_id", 0)
+    cursor = db.users.find(not_deleted(query), projection).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+
+    batch = []
+    async for user in cursor:
+        batch.append(export_row(user, fields))
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield format_rows(batch, fields, export_format)
+            batch = []
+    if batch:
+        yield format_rows(batch, fields, export_format)
+
+
+@router.get("/users/export", dependencies=[Depends(rate_limit("bulk"))], tags=["Users"], summary="Export Users")
+async def export_users(
+    current_user: dict = Depends(get_current_user),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Output format: ndjson or csv"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated fields to export ({', '.join(EXPORT_FIELDS)})"),
+    created_after: Optional[datetime] = Query(None, description="Only users created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only users created before this time"),
+):
+    """
+    **Streams all users as NDJSON or CSV.**
+
+    - **Requires:** Admin role.
+    - **Returns:** One row per user, streamed while the query runs.
+    """
+    require_admin(current_user, "user export")
+    selected_fields = parse_export_fields(fields)
+
+    query = {}
+    if created_after or created_before:
+        query["created"] = {}
+        if created_after:
+            query["created"]["$gte"] = created_after
+        if created_before:
+            query["created"]["$lt"] = created_before
+
+    logger.info("User export started - Format: %s - By: %s", format, current_user['email'])
+    return StreamingResponse(
+        stream_users(query, selected_fields, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+async def read_import_rows(request: Request):
+    """Yields raw rows from a streamed NDJSON body or a JSON array body."""
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        rows = None
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for row in rows:
+        yield row
+
+def parse_import_row(raw) -> UserCreate:
+    """Validates one import row with the `UserCreate` model."""
+    data = json.loads(raw) if isinstance(raw, (bytes, str)) else raw
+    return UserCreate.model_validate(data)
+
+async def insert_documents(documents: list) -> dict:
+    """Inserts documents with one unordered insert_many; returns the write errors by document index."""
+    try:
+        await db.users.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        return {error["index"]: error for error in e.details.get("writeErrors", [])}
+    return {}
+
+async def import_batch(batch: list) -> list:
+    """Hashes a batch of validated rows in parallel and inserts them with one unordered insert_many."""
+    hashed_passwords = await hash_passwords_async([user.password for _, user in batch])
+    documents = [new_user_document(user, hashed) for (_, user), hashed in zip(batch, hashed_passwords)]
+
+    write_errors = await insert_documents(documents)
+
+    # Emails held only by soft-deleted users are released and those rows inserted again, as on registration
+    duplicates = [index for index, error in write_errors.items() if error.get("code") == 11000]
+    if duplicates and await release_emails([documents[index]["email"] for index in duplicates]):
+        retry_errors = await insert_documents([documents[index] for index in duplicates])
+        for position, index in enumerate(duplicates):
+            if position in retry_errors:
+                write_errors[index] = retry_errors[position]
+            else:
+                del write_errors[index]
+    invalidate_user_counts()
+
+    results = []
+    for index, ((row, user), document) in enumerate(zip(batch, documents)):
+        error = write_errors.get(index)
+        if error is None:
+            results.append({"row": row, "status": "created", "id": str(document["_id"]), "email": user.email})
+        elif error.get("code") == 11000:
+            results.append({"row": row, "status": "duplicate", "email": user.email, "errors": ["Email already registered"]})
+        else:
+            results.append({"row": row, "status": "error", "email": user.email, "errors": [error.get("errmsg", "Insert failed")]})
+    return results
+
+
+@router.post("/users/import", response_model=ImportResponse, dependencies=[Depends(rate_limit("bulk"))], tags=["Users"], summary="Import Users")
+async def import_users(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    **Creates users in bulk from an NDJSON stream or a JSON array.**
+
+    - **Requires:** Admin role.
+    - **Body:** `application/x-ndjson` (one user per line, streamed) or a JSON array,
+      each row shaped like the `POST /api/users` body.
+    - **Returns:** Per-row results (`created`, `duplicate`, `invalid` or `error`).
+    """
+    require_admin(current_user, "user import")
+
+    results = []
+    batch = []
+    row = -1
+    async for raw in read_import_rows(request):
+        row += 1
+        try:
+            batch.append((row, parse_import_row(raw)))
+        except ValidationError as e:
+            results.append({"row": row, "status": "invalid", "errors": [error["msg"] for error in e.errors()]})
+            continue
+        except ValueError:
+            results.append({"row": row, "status": "invalid", "errors": ["Invalid JSON"]})
+            continue
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            results.extend(await import_batch(batch))
+            batch = []
+    if batch:
+        results.extend(await import_batch(batch))
+
+    results.sort(key=lambda result: result["row"])
+    counts = {status: 0 for status in ("created", "duplicate", "invalid", "error")}
+    for result in results:
+        counts[result["status"]] += 1
+
+    logger.info(
+        "User import finished - Rows: %s - Created: %s - Duplicates: %s - Invalid: %s - Failed: %s - By: %s",
+        row + 1, counts['created'], counts['duplicate'], counts['invalid'], counts['error'], current_user['email'],
+    )
+    return {
+        "created": counts["created"],
+        "duplicates": counts["duplicate"],
+        "invalid": counts["invalid"],
+        "failed": counts["error"],
+        "results": results,
+    }
+
+
+async def resolve_targets(body: BulkDeleteRequest) -> tuple:
+    """
+    Resolves what a bulk request targets.
+
+    Returns (query, found, results). With `ids` (at most 1000), one query checks which
+    users exist: `found` holds their ObjectIds and `results` the invalid or missing IDs.
+    With a `filter`, no user is loaded: `found` is None and the write uses the query as is.
+    """
+    if (body.ids is None) == (body.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+
+    if body.filter is not None:
+        query = {}
+        if body.filter.role:
+            query["role"] = body.filter.role.strip()
+        if body.filter.created_after or body.filter.created_before:
+            query["created"] = {}
+            if body.filter.created_after:
+                query["created"]["$gte"] = body.filter.created_after
+            if body.filter.created_before:
+                query["created"]["$lt"] = body.filter.created_before
+        if not query:
+            raise HTTPException(status_code=400, detail="Filter must not be empty")
+        return query, None, []
+
+    results = []
+    requested = []
+    for user_id in dict.fromkeys(user_id.strip() for user_id in body.ids):
+        if ObjectId.is_valid(user_id):
+            requested.append(ObjectId(user_id))
+        else:
+            results.append({"id": user_id, "status": "invalid_id"})
+
+    found = [user["_id"] async for user in db.users.find(not_deleted({"_id": {"$in": requested}}), {"_id": 1})]
+    existing = set(found)
+    results.extend({"id": str(user_id), "status": "not_found"} for user_id in requested if user_id not in existing)
+    return {"_id": {"$in": found}}, found, results
+
+
+@router.post("/users/bulk-update", response_model=BulkResponse, dependencies=[Depends(rate_limit("bulk"))], tags=["Users"], summary="Bulk Update Users")
+async def bulk_update_users(body: BulkUpdateRequest, current_user: dict = Depends(get_current_user)):
+    """
+    **Applies the same change to many users with one update_many.**
+
+    - **Requires:** Admin role.
+    - **Targets:** `ids` (max 1000) or a `filter` on role / creation date.
+    - **Updates:** `name` and/or `role`, validated like `PUT /api/users/{id}`.
+    - **Returns:** Matched and modified counts, plus per-id outcomes when targeting `ids`.
+    """
+    require_admin(current_user, "bulk user update")
+
+    update_data = {}
+    if body.update.name is not None:
+        update_data["name"] = validate_name(body.update.name)
+    if body.update.role is not None:
+        if not body.update.role.strip():
+            raise HTTPException(status_code=422, detail="Role must contain characters")
+        update_data["role"] = body.update.role.strip()
+    if not update_data:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+
+    query, found, results = await resolve_targets(body)
+    matched = modified = 0
+    if found is None or found:
+        update_data["updated"] = datetime.now(timezone.utc)
+        result = await db.users.update_many(not_deleted(query), user_update_operations(update_data))
+        matched, modified = result.matched_count, result.modified_count
+        if found is None:
+            invalidate_all_principals()
+        else:
+            invalidate_principals(found)
+            results.extend({"id": str(user_id), "status": "updated"} for user_id in found)
+        if "role" in update_data:
+            invalidate_user_counts()
+
+    logger.info("Bulk user update - Matched: %s - Fields: %s - By: %s", matched, sorted(update_data), current_user['email'])
+    return {"matched": matched, "modified": modified, "results": results}
+
+
+@router.post("/users/bulk-delete", response_model=BulkResponse, dependencies=[Depends(rate_limit("bulk"))], tags=["Users"], summary="Bulk Delete Users")
+async def bulk_delete_users(body: BulkDeleteRequest, current_user: dict = Depends(get_current_user)):
+    """
+    **Deletes (or soft-deletes) many users with one write.**
+
+    - **Requires:** Admin role.
+    - **Targets:** `ids` (max 1000) or a `filter` on role / creation date.
+    - **Returns:** The number of deleted users, plus per-id outcomes when targeting `ids`.
+    """
+    require_admin(current_user, "bulk user deletion")
+
+    query, found, results = await resolve_targets(body)
+    deleted = 0
+    if found is None:
+        deleted = await delete_users(query)
+        # Refresh tokens are not looked up per user here: /auth/refresh rejects them once
+        # their user is gone, and they expire through their TTL index
+        invalidate_all_principals()
+        invalidate_user_counts()
+    elif found:
+        deleted = await delete_users(query)
+        invalidate_principals(found)
+        invalidate_user_counts()
+        await revoke_user_refresh_tokens(found)
+        results.extend({"id": str(user_id), "status": "deleted"} for user_id in found)
+
+    logger.info("Bulk user deletion - Deleted: %s - By: %s", deleted, current_user['email'])
+    return {"matched": deleted, "modified": deleted, "results": results}
@@ -1,25 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from typing import List, Optional, Union
 from app.database import db
-from app.models import UserCreate, UserUpdate, UserResponse
-from app.security import hash_password, get_current_user
+from app.models import UserCreate, UserUpdate, UserResponse, UserBatchResponse
+from app.responses import model_response
+from app.security import hash_password_async, get_current_user, invalidate_principal
+from app.refresh_tokens import revoke_user_refresh_tokens
+from app.loaders import users_by_id
+from app.soft_delete import SOFT_DELETE, delete_users, not_deleted, release_email
+from app.utils.cache import TTLCache
+from app.utils.rate_limiter import rate_limit
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timezone
+import base64
+import binascii
 import re
 import logging
+import os
 
 router = APIRouter()
 
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Log to file
-        logging.StreamHandler()  # Log to console
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
 # Constants for error messages
@@ -29,23 +31,66 @@ ERROR_403_FORBIDDEN_ACCESS_MESSAGE = "Forbidden: Access denied"
 ERROR_400_INVALID_ID = "Invalid user ID format"
 ERROR_403_ROLE_CHANGE = "Forbidden: Cannot change role"
 ERROR_401_NOT_AUTHENTICATED = "Not authenticated"
+ERROR_400_INVALID_CURSOR = "Invalid cursor"
 
+# Response headers carrying the cursor of the next page and the total number of matching users
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
 
-@router.post("/users", status_code=status.HTTP_201_CREATED, response_model=UserResponse, tags=["Users"], summary="Create a New User")
-async def create_user(user: UserCreate):
-    """
-    **Creates a new user in the system.**
+# Maximum number of IDs accepted by a batch lookup (GET /api/users?ids=...)
+USER_BATCH_MAX_IDS = int(os.getenv("USER_BATCH_MAX_IDS", 100))
 
-    - **Requires:** `name`, `email`, `password`
-    - **Returns:** The created user details.
-    """
-    existing_user = await db["users"].find_one({"email": user.email})
-    if existing_user:
-        logger.warning(f"User creation failed: Email already exists - {user.email}")
-        raise HTTPException(status_code=400, detail=ERROR_400_EMAIL_EXISTS_MESSAGE)
+# Filtered user counts, cached briefly per worker and cleared (on this worker) when users are created, deleted
+# or change role
+USER_COUNT_CACHE_SIZE = int(os.getenv("USER_COUNT_CACHE_SIZE", 100))
+USER_COUNT_CACHE_TTL = float(os.getenv("USER_COUNT_CACHE_TTL", 30))  # seconds; 0 disables the cache
+USER_COUNT_CACHE = TTLCache("user_counts", maxsize=USER_COUNT_CACHE_SIZE, ttl=USER_COUNT_CACHE_TTL)
+
+# Changing these fields bumps the user's token_version, invalidating stateless tokens issued before
+TOKEN_VERSION_FIELDS = ("role", "password")
+
+
+def user_response(user: dict) -> UserResponse:
+    """Builds the response model from a trusted user document without revalidating it."""
+    return UserResponse.model_construct(
+        id=str(user["_id"]),
+        name=user["name"],
+        email=user["email"],
+        created_at=user.get("created") or user.get("created_at") or datetime.now(timezone.utc),
+    )
 
-    hashed_password = hash_password(user.password)
-    new_user = {
+def user_update_operations(update_data: dict) -> dict:
+    """Builds the update document, bumping token_version when a security-relevant field changes."""
+    operations = {"$set": update_data}
+    if any(field in update_data for field in TOKEN_VERSION_FIELDS):
+        operations["$inc"] = {"token_version": 1}
+    return operations
+
+async def count_users(query: dict) -> int:
+    """
+    Total number of users matching `query`. The unfiltered total comes from the collection
+    metadata (estimated_document_count); filtered totals are counted and cached.
+    """
+    # Soft-deleted users would be included in the estimate. It also counts any left over from running with
+    # SOFT_DELETE=true, since they are only purged in that mode (see the README)
+    if not query and not SOFT_DELETE:
+        return await db.users.estimated_document_count()
+
+    key = tuple(sorted(query.items()))
+    total = USER_COUNT_CACHE.get(key)
+    if total is None:
+        generation = USER_COUNT_CACHE.generation
+        total = await db.users.count_documents(not_deleted(query))
+        USER_COUNT_CACHE.set(key, total, generation=generation)
+    return total
+
+def invalidate_user_counts():
+    """Drops cached counts after users are created, deleted or change role."""
+    USER_COUNT_CACHE.clear()
+
+def new_user_document(user: UserCreate, hashed_password: str) -> dict:
+    """Builds the document stored for a new user."""
+    return {
         "name": user.name,
         "email": user.email,
         "password": hashed_password,
@@ -53,27 +98,68 @@ async def create_user(user: UserCreate):
         "created": datetime.now(timezone.utc),
         "updated": datetime.now(timezone.utc)
     }
-    result = await db.users.insert_one(new_user)
+
+async def insert_user(new_user: dict):
+    """Inserts a user, retrying once if the email only belonged to a soft-deleted user."""
+    try:
+        return await db.users.insert_one(new_user)
+    except DuplicateKeyError:
+        if not await release_email(new_user["email"]):
+            raise
+        new_user.pop("_id", None)
+        return await db.users.insert_one(new_user)
+
+@router.post("/users", status_code=status.HTTP_201_CREATED, response_model=UserResponse, dependencies=[Depends(rate_limit("register"))], tags=["Users"], summary="Create a New User")
+async def create_user(user: UserCreate):
+    """
+    **Creates a new user in the system.**
+
+    - **Requires:** `name`, `email`, `password`
+    - **Returns:** The created user details.
+    """
+    hashed_password = await hash_password_async(user.password)
+    new_user = new_user_document(user, hashed_password)
+    # Email uniqueness is enforced by the unique email index
+    try:
+        result = await insert_user(new_user)
+    except DuplicateKeyError:
+        logger.warning("User creation failed: Email already exists - %s", user.email)
+        raise HTTPException(status_code=400, detail=ERROR_400_EMAIL_EXISTS_MESSAGE)
     if not result.inserted_id:
-        logger.error(f"User creation failed for email: {user.email}")
+        logger.error("User creation failed for email: %s", user.email)
         raise HTTPException(status_code=500, detail="User creation failed")
     
-    logger.info(f"User created successfully: {user.email}")
-    return UserResponse(id=str(result.inserted_id), name=user.name, email=user.email, created_at=new_user["created"].isoformat())
+    invalidate_user_counts()
+    logger.info("User created successfully: %s", user.email)
+    return model_response(user_response(new_user), status_code=status.HTTP_201_CREATED)
 
-@router.get("/users", response_model=List[UserResponse], tags=["Users"], summary="List All Users")
+@router.get("/users", response_model=Union[List[UserResponse], UserBatchResponse], dependencies=[Depends(rate_limit("read"))], tags=["Users"], summary="List All Users")
 async def list_users(
     request: Request, 
+    response: Response,
     current_user: dict = Depends(get_current_user),  # Requires authentication
     page: int = Query(1, ge=1, description="Page number (must be >= 1)"),
     limit: int = Query(10, ge=1, description="Limit per page (default: 10, max: 100)"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page (overrides page)"),
+    role: Optional[str] = Query(None, description="Only list users with this role"),
+    count: bool = Query(True, description="Return the total in the X-Total-Count header (false skips counting)"),
+    ids: Optional[str] = Query(None, description="Comma-separated user IDs to fetch in one request (batch lookup)"),
 ):
     """
     **Fetches a paginated list of users.**
     
     - **Requires:** Admin role.
-    - **Returns:** A paginated list of users.
+    - **Returns:** A paginated list of users, ordered by ID.
+    - **Paging:** When more users follow, the `X-Next-Cursor` header holds the value to pass as `after`
+      for the next page. Cursor paging costs the same on every page; `page` is kept for compatibility.
+    - **Total:** `X-Total-Count` holds the number of matching users (estimated when unfiltered, cached
+      briefly when filtered). Pass `count=false` to skip it, e.g. when loading further pages.
+    - **Batch lookup:** With `ids=<id>,<id>,...` (max 100 by default), any authenticated user gets the requested
+      profiles with one query, split into `found`, `missing` and `forbidden` (non-admins only see themselves).
     """
+    if ids is not None:
+        return model_response(await get_users_by_ids(ids, current_user))
+
     # Cap `limit` to 100 instead of rejecting it
     if limit > 100:
         limit = 100  # Set a max limit internally
@@ -85,34 +171,72 @@ async def list_users(
     
     # Ensure only admins can fetch all users
     if current_user["role"] != "admin":
-        logger.warning(f"Unauthorized user listing attempt by: {current_user['email']}")
+        logger.warning("Unauthorized user listing attempt by: %s", current_user['email'])
         raise HTTPException(status_code=403, detail=ERROR_403_FORBIDDEN_ACCESS_MESSAGE)
 
-    # Count total users
-    total_users = await db.users.count_documents({})
-    if total_users == 0:
-        return []
-
-    # Fetch users with pagination
-    skip = (page - 1) * limit
-    users_cursor = db.users.find({}, {"_id": 1, "name": 1, "email": 1, "created_at": 1}).skip(skip).limit(limit)
-    users_list = await users_cursor.to_list(length=limit)
-
-    return [
-            UserResponse(
-                id=str(user["_id"]),
-                name=user["name"],
-                email=user["email"],
-                created_at=user.get("created_at", datetime.now(timezone.utc).isoformat()),
-            ) for user in users_list
-        ]
+    # Fetch one extra row to learn whether another page follows
+    query = {"role": role.strip()} if role and role.strip() else {}
+    projection = {"_id": 1, "name": 1, "email": 1, "created": 1}
+    if after:
+        users_cursor = db.users.find(not_deleted({**query, "_id": {"$gt": decode_cursor(after)}}), projection)
+    else:
+        users_cursor = db.users.find(not_deleted(query), projection).skip((page - 1) * limit)
+    users_cursor = users_cursor.sort("_id", 1).limit(limit + 1)
+    users_list = await users_cursor.to_list(length=limit + 1)
+
+    if len(users_list) > limit:
+        users_list = users_list[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(users_list[-1]["_id"])
+    if count:
+        response.headers[TOTAL_COUNT_HEADER] = str(await count_users(query))
+
+    return model_response([user_response(user) for user in users_list], response=response)
+
+async def get_users_by_ids(ids: str, current_user: dict) -> UserBatchResponse:
+    """Resolves a batch lookup with a single $in query, applying the admin/self rule per ID."""
+    requested = list(dict.fromkeys(user_id.strip() for user_id in ids.split(",") if user_id.strip()))
+    if len(requested) > USER_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Too many IDs (max {USER_BATCH_MAX_IDS})")
+    if any(not is_valid_objectid(user_id) for user_id in requested):
+        logger.warning("Invalid User ID format in batch lookup - Requested by: %s", current_user['email'])
+        raise HTTPException(status_code=400, detail=ERROR_400_INVALID_ID)
+
+    projection = {"_id": 1, "name": 1, "email": 1, "created": 1}
+    users_cursor = db.users.find(not_deleted({"_id": {"$in": [ObjectId(user_id) for user_id in requested]}}), projection)
+    users = {str(user["_id"]): user async for user in users_cursor}
+
+    is_admin = current_user["role"] == "admin"
+    found, missing, forbidden = [], [], []
+    for user_id in requested:
+        if user_id not in users:
+            missing.append(user_id)
+        elif is_admin or str(current_user["_id"]) == user_id:
+            found.append(user_response(users[user_id]))
+        else:
+            forbidden.append(user_id)
+    if forbidden:
+        logger.warning("Unauthorized batch access attempt by: %s to users: %s", current_user['email'], forbidden)
+
+    return UserBatchResponse.model_construct(found=found, missing=missing, forbidden=forbidden)
+
+# Helper functions for opaque pagination cursors
+def encode_cursor(last_id: ObjectId) -> str:
+    """Encodes the ID of the last returned user as an opaque cursor."""
+    return base64.urlsafe_b64encode(last_id.binary).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> ObjectId:
+    """Decodes a cursor produced by `encode_cursor`."""
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor.strip() + "=" * (-len(cursor.strip()) % 4)))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        logger.warning("Invalid pagination cursor: %s", cursor)
+        raise HTTPException(status_code=400, detail=ERROR_400_INVALID_CURSOR)
 
 # Helper function to validate ObjectId format
 def is_valid_objectid(user_id: str) -> bool:
     return ObjectId.is_valid(user_id)
 
-@router.get("/users/{user_id}", response_model=UserResponse, tags=["Users"], summary="Get User by ID")
-# @limiter.limit("10/minute")
+@router.get("/users/{user_id}", response_model=UserResponse, dependencies=[Depends(rate_limit("read"))], tags=["Users"], summary="Get User by ID")
 async def get_user(request: Request, user_id: str, current_user: dict = Depends(get_current_user)):
     """
     **Fetch a user by ID.**
@@ -127,30 +251,25 @@ async def get_user(request: Request, user_id: str, current_user: dict = Depends(
         raise HTTPException(status_code=400, detail=ERROR_400_INVALID_ID)
 
     # Fetch user from DB
-    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1, "name": 1, "email": 1, "created_at": 1})
+    user = await users_by_id.load(ObjectId(user_id))
 
     if not user:
-        logger.warning(f"User not found: {user_id}")
+        logger.warning("User not found: %s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
 
     # Authorization: Users can only access their own profiles (unless admin)
     if current_user["role"] != "admin" and str(current_user["_id"]) != user_id:
-        logger.warning(f"Unauthorized access attempt by: {current_user['email']} to user: {user_id}")
+        logger.warning("Unauthorized access attempt by: %s to user: %s", current_user['email'], user_id)
         raise HTTPException(status_code=403, detail=ERROR_403_FORBIDDEN_ACCESS_MESSAGE)
 
     # Convert MongoDB ObjectId to string and return response
-    return UserResponse(
-        id=str(user["_id"]),
-        name=user["name"],
-        email=user["email"],
-        created_at=user.get("created_at", datetime.now(timezone.utc).isoformat())
-    )
+    return model_response(user_response(user))
 
 # **Helper Functions**
 def validate_user_id(user_id: str, current_user: dict):
     """Validates the user ID format."""
     if not is_valid_objectid(user_id.strip()) or re.search(r"['\";<>()]", user_id):
-        logger.warning(f"Invalid User ID format: {user_id} - Requested by: {current_user['email']}")
+        logger.warning("Invalid User ID format: %s - Requested by: %s", user_id, current_user['email'])
         raise HTTPException(status_code=400, detail=ERROR_400_INVALID_ID)
     return ObjectId(user_id.strip())
 
@@ -168,34 +287,63 @@ def validate_name(name: str):
         raise HTTPException(status_code=400, detail="Invalid characters in name")
     return name
 
-async def validate_email(email: str, user_id: str, current_user: dict):
-    """Check if email is unique and return the normalized email."""
-    existing_email = await db.users.find_one({"email": email})
-    if existing_email and str(existing_email["_id"]) != user_id:
-        logger.warning(f"Duplicate email update attempt - Email: {email} - By: {current_user['email']}")
-        raise HTTPException(status_code=400, detail="Email already registered")
-    return email.lower()
+def validate_email(email: str):
+    """Return the normalized email (uniqueness is enforced by the unique email index)."""
+    return email.strip().lower()
 
 
-def validate_password(password: str):
+async def validate_password(password: str):
     """Validates and hashes the password."""
     if len(password) < 6:
         logger.warning("Password must be at least 6 characters")
         raise HTTPException(status_code=422, detail="Password must be at least 6 characters")
-    return hash_password(password)
+    return await hash_password_async(password)
 
-async def update_user_in_db(user_id: ObjectId, update_data: dict):
-    """Updates user details in the database and returns the updated user."""
+async def update_user_in_db(user_id: ObjectId, update_data: dict, current_user: dict):
+    """Updates user details and returns the updated user in a single round trip (None if no user matched)."""
     update_data["updated"] = datetime.now(timezone.utc)
-    result = await db.users.update_one({"_id": user_id}, {"$set": update_data})
 
-    if result.matched_count == 0:
-        logger.warning(ERROR_404_MESSAGE)
-        raise HTTPException(status_code=404, detail=ERROR_404_MESSAGE)
+    def update():
+        return db.users.find_one_and_update(
+            not_deleted({"_id": user_id}),
+            user_update_operations(update_data),
+            projection={"password": 0},  # Exclude password
+            return_document=ReturnDocument.AFTER,
+        )
+
+    try:
+        try:
+            updated_user = await update()
+        except DuplicateKeyError:
+            # Retry once if the email only belonged to a soft-deleted user
+            if "email" not in update_data or not await release_email(update_data["email"]):
+                raise
+            updated_user = await update()
+    except DuplicateKeyError:
+        logger.warning("Duplicate email update attempt - Email: %s - By: %s", update_data.get('email'), current_user['email'])
+        raise HTTPException(status_code=400, detail=ERROR_400_EMAIL_EXISTS_MESSAGE)
+    invalidate_principal(user_id)
+    if "role" in update_data:
+        invalidate_user_counts()
 
-    return await db.users.find_one({"_id": user_id}, {"password": 0})  # Exclude password
+    # A new password signs the user out of every session
+    if updated_user and "password" in update_data:
+        await revoke_user_refresh_tokens([user_id])
+
+    return updated_user
+
+async def reject_foreign_user(user_id: ObjectId, current_user: dict, action: str):
+    """
+    Rejects a non-admin acting on another user's profile: 404 if that user does
+    not exist, 403 otherwise (one existence check, no write attempted).
+    """
+    if not await users_by_id.load(user_id):
+        logger.warning("User not found: %s - Requested by: %s", user_id, current_user['email'])
+        raise HTTPException(status_code=404, detail=ERROR_404_MESSAGE)
+    logger.warning("Unauthorized user %s attempt - Target: %s - By: %s", action, user_id, current_user['email'])
+    raise HTTPException(status_code=403, detail=ERROR_403_FORBIDDEN_ACCESS_MESSAGE)
 
-@router.put("/users/{user_id}", response_model=UserResponse, tags=["Users"], summary="Update User Details")
+@router.put("/users/{user_id}", response_model=UserResponse, dependencies=[Depends(rate_limit("write"))], tags=["Users"], summary="Update User Details")
 async def update_user(
     request: Request, 
     user_id: str, 
@@ -211,44 +359,38 @@ async def update_user(
 
     user_id = validate_user_id(user_id, current_user)
 
-    user = await db.users.find_one({"_id": user_id})
-    if not user:
-        logger.warning(f"User not found: {user_id} - Requested by: {current_user['email']}")
-        raise HTTPException(status_code=404, detail=ERROR_404_MESSAGE)
-
+    # Non-admins may only target their own document, so the update filter never matches anyone else's
     if current_user["role"] != "admin" and str(current_user["_id"]) != str(user_id):
-        logger.warning(f"Unauthorized user update attempt - Target: {user_id} - By: {current_user['email']}")
-        raise HTTPException(status_code=403, detail=ERROR_403_FORBIDDEN_ACCESS_MESSAGE)
+        await reject_foreign_user(user_id, current_user, "update")
 
     update_data = {}
     if user_update.name:
         update_data["name"] = validate_name(user_update.name)
 
     if user_update.email:
-        update_data["email"] = await validate_email(user_update.email, str(user_id), current_user)
+        update_data["email"] = validate_email(user_update.email)
 
 
     if user_update.password:
-        update_data["password"] = validate_password(user_update.password)
+        update_data["password"] = await validate_password(user_update.password)
 
     if user_update.role:
         if current_user["role"] != "admin":
-            logger.warning(f"Unauthorized role change attempt - User: {current_user['email']} tried changing {user_id}'s role")
+            logger.warning("Unauthorized role change attempt - User: %s tried changing %s's role", current_user['email'], user_id)
             raise HTTPException(status_code=403, detail=ERROR_403_ROLE_CHANGE)
         update_data["role"] = user_update.role.strip()
 
-    updated_user = await update_user_in_db(user_id, update_data)
+    # Email uniqueness is enforced by the unique email index
+    updated_user = await update_user_in_db(user_id, update_data, current_user)
+    if not updated_user:
+        logger.warning("User not found: %s - Requested by: %s", user_id, current_user['email'])
+        raise HTTPException(status_code=404, detail=ERROR_404_MESSAGE)
 
-    logger.info(f"User updated successfully - User: {updated_user['email']} (ID: {user_id}) - Updated by: {current_user['email']}")
+    logger.info("User updated successfully - User: %s (ID: %s) - Updated by: %s", updated_user['email'], user_id, current_user['email'])
 
-    return UserResponse(
-        id=str(updated_user["_id"]),
-        name=updated_user["name"],
-        email=updated_user["email"],
-        created_at=updated_user.get("created_at", datetime.now(timezone.utc).isoformat()),
-    )
+    return model_response(user_response(updated_user))
 
-@router.delete("/users/{user_id}", tags=["Users"], summary="Delete a User")
+@router.delete("/users/{user_id}", dependencies=[Depends(rate_limit("write"))], tags=["Users"], summary="Delete a User")
 async def delete_user(
     request: Request, 
     user_id: str, 
@@ -265,27 +407,22 @@ async def delete_user(
 
     # **Security: Validate user_id format**
     if not is_valid_objectid(user_id) or re.search(r"['\";<>()]", user_id):
-        logger.warning(f"Invalid User ID format: {user_id} - Requested by: {current_user['email']}")
+        logger.warning("Invalid User ID format: %s - Requested by: %s", user_id, current_user['email'])
         raise HTTPException(status_code=400, detail=ERROR_400_INVALID_ID)
 
-    # **Fetch user from DB**
-    user_to_delete = await db.users.find_one({"_id": ObjectId(user_id)})
+    # Non-admins may only target their own document, so the delete filter never matches anyone else's
+    if current_user["role"] != "admin" and str(current_user["_id"]) != user_id:
+        await reject_foreign_user(ObjectId(user_id), current_user, "deletion")
 
-    if not user_to_delete:
-        logger.warning(f"User not found: {user_id} - Requested by: {current_user['email']}")
+    # **Delete (or soft-delete) the user in a single operation**
+    deleted_count = await delete_users({"_id": ObjectId(user_id)})
+    if deleted_count == 0:
+        logger.warning("User not found: %s - Requested by: %s", user_id, current_user['email'])
         raise HTTPException(status_code=404, detail=ERROR_404_MESSAGE)
 
-    # **Authorization: Only allow user to delete self or admin to delete any user**
-    if current_user["role"] != "admin" and str(current_user["_id"]) != user_id:
-        logger.warning(f"Unauthorized user deletion attempt - Target: {user_id} - By: {current_user['email']}")
-        raise HTTPException(status_code=403, detail=ERROR_403_FORBIDDEN_ACCESS_MESSAGE)
-
-    # **Delete user from DB**
-    result = await db.users.delete_one({"_id": ObjectId(user_id)})
+    invalidate_principal(user_id)
+    invalidate_user_counts()
+    await revoke_user_refresh_tokens([ObjectId(user_id)])
 
-    if result.deleted_count == 0:
-        logger.error(f"User deletion failed - User ID: {user_id} - Requested by: {current_user['email']}")
-        raise HTTPException(status_code=500, detail="User deletion failed")
-    
-    logger.info(f"User deleted successfully - User ID: {user_id} - Deleted by: {current_user['email']}")
-    return {"message": "User deleted successfully"}
\ No newline at end of file
+    logger.info("User deleted successfully - User ID: %s - Deleted by: %s", user_id, current_user['email'])
+    return {"message": "User deleted successfully"}
@@ -8,11 +8,63 @@ from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from app.database import db
+from app.revocation import revoke_token, is_token_revoked
+from app.loaders import users_by_id, forget_users
+from app.utils.cache import TTLCache
+from app.metrics import PASSWORD_HASH_LATENCY
 from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
+import hashlib
+import logging
+import uuid
 import os
 
+logger = logging.getLogger(__name__)
+
+# Password hashing schemes: the first one hashes new passwords, the others are only verified
+# and migrated on the next signin ("argon2" requires the argon2-cffi package)
+PASSWORD_SCHEMES = [scheme.strip() for scheme in os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",") if scheme.strip()]
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 3))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 65536))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 4))
+
+
+def build_password_context(
+    schemes: list = None,
+    bcrypt_rounds: int = PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost: int = PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost: int = PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism: int = PASSWORD_ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    Builds the password context. Hashes made with another scheme or cost
+    are reported by `needs_update` and rehashed on the next signin.
+    """
+    schemes = schemes or PASSWORD_SCHEMES
+    settings = {}
+    if "bcrypt" in schemes:
+        settings["bcrypt__rounds"] = bcrypt_rounds
+    if "argon2" in schemes:
+        settings.update(
+            argon2__time_cost=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
 # Initialize password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_password_context()
+
+# Worker pool for password hashing ("thread" or "process")
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 100))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+# Bulk hashing (imports) leaves one worker free for interactive signins by default
+PASSWORD_HASH_BULK_CONCURRENCY = int(os.getenv("PASSWORD_HASH_BULK_CONCURRENCY", max(1, PASSWORD_HASH_WORKERS - 1)))
+PASSWORD_HASH_BULK_CHUNK_SIZE = 8
 
 # Load environment variables for JWT
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -20,22 +72,224 @@ ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/signin")
 
-# Store revoked tokens temporarily (or use a DB)
-REVOKED_TOKENS = set()
+# Cache of authenticated principals (id, name, email, role) keyed by user ID. The cache is per worker:
+# writes only invalidate the worker that handled them, so the TTL bounds how long others serve a stale role
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 5))
+PRINCIPAL_CACHE = TTLCache("principals", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+# Stateless mode: tokens carry the principal (name, email, role) and the user's token_version,
+# so requests are authenticated without loading the user; only the version is checked (and cached per
+# worker, so the TTL bounds how long other workers accept tokens invalidated elsewhere)
+STATELESS_AUTH = os.getenv("STATELESS_AUTH", "false").lower() == "true"
+TOKEN_VERSION_CACHE_SIZE = int(os.getenv("TOKEN_VERSION_CACHE_SIZE", 10000))
+TOKEN_VERSION_CACHE_TTL = float(os.getenv("TOKEN_VERSION_CACHE_TTL", 5))
+TOKEN_VERSION_CACHE = TTLCache("token_versions", maxsize=TOKEN_VERSION_CACHE_SIZE, ttl=TOKEN_VERSION_CACHE_TTL)
+
+# Cache of verified token claims keyed by token digest (entries never outlive the token's exp)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 300))
+TOKEN_CACHE = TTLCache("tokens", maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+
+def decode_access_token(token: str) -> dict:
+    """Verifies a JWT and returns its claims (raises JWTError if invalid)."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def verify_access_token(token: str) -> dict:
+    """
+    Returns the claims of a valid token, skipping signature verification for tokens
+    already verified by this worker (raises JWTError if invalid).
+    """
+    digest = token_digest(token)
+    payload = TOKEN_CACHE.get(digest)
+    if payload is None:
+        payload = decode_access_token(token)
+        ttl = TOKEN_CACHE_TTL
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - datetime.now(timezone.utc).timestamp())
+        TOKEN_CACHE.set(digest, payload, ttl=ttl)
+    return dict(payload)
+
+def token_id(payload: dict, token: str) -> str:
+    """Returns the revocation key of a token: its `jti`, or a digest for tokens issued without one."""
+    return payload.get("jti") or token_digest(token)
+
+def token_expiry(payload: dict) -> datetime:
+    """Returns the expiry of a token as an aware datetime."""
+    if "exp" in payload:
+        return datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    return datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+async def invalidate_token(token: str):
+    """Revokes a token on every worker until it expires."""
+    payload = verify_access_token(token)
+    await revoke_token(token_id(payload, token), token_expiry(payload))
+    TOKEN_CACHE.delete(token_digest(token))
+
+def invalidate_principal(user_id):
+    """Drops a cached principal (and token version) so the next request reloads it from the database."""
+    PRINCIPAL_CACHE.delete(str(user_id))
+    TOKEN_VERSION_CACHE.delete(str(user_id))
+    forget_users()
+
+def invalidate_principals(user_ids):
+    """Drops several cached principals at once."""
+    user_ids = [str(user_id) for user_id in user_ids]
+    PRINCIPAL_CACHE.delete_many(user_ids)
+    TOKEN_VERSION_CACHE.delete_many(user_ids)
+    forget_users()
+
+def invalidate_all_principals():
+    """Drops every cached principal, for writes selected by a filter rather than by ID."""
+    PRINCIPAL_CACHE.clear()
+    TOKEN_VERSION_CACHE.clear()
+    forget_users()
 
+def access_token_claims(user: dict) -> dict:
+    """Returns the claims of a new access token for `user` (the principal too in stateless mode)."""
+    claims = {"sub": str(user["_id"])}
+    if STATELESS_AUTH:
+        claims.update(
+            name=user["name"],
+            email=user["email"],
+            role=user.get("role", "user"),
+            ver=user.get("token_version", 0),
+        )
+    return claims
 
-def invalidate_token(token: str):
-    """Adds the token to the revoked list."""
-    REVOKED_TOKENS.add(token)
+async def get_token_version(user_id: str):
+    """Returns the current token_version of a user (None if the user no longer exists)."""
+    version = TOKEN_VERSION_CACHE.get(user_id)
+    if version is None:
+        generation = TOKEN_VERSION_CACHE.generation
+        user = await users_by_id.load(ObjectId(user_id))
+        if not user:
+            return None
+        version = user.get("token_version", 0)
+        TOKEN_VERSION_CACHE.set(user_id, version, generation=generation)
+    return version
 
 def hash_password(password: str) -> str:
-    """Hashes a plain-text password using bcrypt."""
+    """
+    Hashes a plain-text password with the first of PASSWORD_SCHEMES (bcrypt or argon2)
+    and its configured cost; older hashes are rehashed on the next signin.
+    """
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a given password against its hashed version."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def password_needs_update(hashed_password: str) -> bool:
+    """Tells whether a hash uses an outdated scheme or cost (cheap, no hashing)."""
+    return pwd_context.needs_update(hashed_password)
+
+def hash_passwords(passwords: list) -> list:
+    """Hashes several plain-text passwords sequentially (one worker job)."""
+    return [hash_password(password) for password in passwords]
+
+_hash_executor = None
+_hash_slots = None
+_bulk_hash_slots = None
+
+def get_hash_executor():
+    """Returns the worker pool used for password hashing, creating it on first use."""
+    global _hash_executor
+    if _hash_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _hash_executor
+
+def shutdown_hash_executor():
+    """Shuts down the password hashing pool (called on application shutdown)."""
+    global _hash_executor, _hash_slots, _bulk_hash_slots
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+    _hash_executor = None
+    _hash_slots = None
+    _bulk_hash_slots = None
+
+async def run_in_hash_pool(func, *args, wait: bool = False, timeout: float = PASSWORD_HASH_TIMEOUT):
+    """
+    Runs a blocking hashing function on the worker pool.
+
+    At most `PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE` jobs are admitted at once;
+    extra jobs are rejected with 503 instead of piling up behind the pool, unless
+    `wait` is set. A slot is only released once its job has actually left the pool.
+    """
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE)
+    if _hash_slots.locked() and not wait:
+        raise HTTPException(status_code=503, detail="Server busy. Try again later.")
+
+    await _hash_slots.acquire()
+    loop = asyncio.get_running_loop()
+    slots = _hash_slots
+    try:
+        job = get_hash_executor().submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    job.add_done_callback(lambda _: loop.call_soon_threadsafe(slots.release))
+
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Password hashing timed out")
+
+async def hash_password_async(password: str) -> str:
+    """Hashes a password on the worker pool without blocking the event loop."""
+    with PASSWORD_HASH_LATENCY.labels("hash").time():
+        return await run_in_hash_pool(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifies a password on the worker pool without blocking the event loop."""
+    with PASSWORD_HASH_LATENCY.labels("verify").time():
+        return await run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def rehash_password(user_id, old_hash: str, plain_password: str):
+    """
+    Replaces an outdated hash after a successful signin (run as a background task).
+
+    The update only applies if the stored hash is still `old_hash`, so a password
+    changed in the meantime is never overwritten.
+    """
+    try:
+        new_hash = await run_in_hash_pool(hash_password, plain_password, wait=True)
+        result = await db.users.update_one({"_id": user_id, "password": old_hash}, {"$set": {"password": new_hash}})
+    except Exception:
+        logger.exception("Password rehash failed - User ID: %s", user_id)
+        return
+    if result.modified_count:
+        logger.info("Password rehashed with current settings - User ID: %s", user_id)
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    Hashes many passwords in parallel on the worker pool (used by bulk imports).
+
+    Work is split into small chunks and at most `PASSWORD_HASH_BULK_CONCURRENCY` chunks
+    run at once, so interactive hashing keeps getting workers during an import.
+    """
+    global _bulk_hash_slots
+    if _bulk_hash_slots is None:
+        _bulk_hash_slots = asyncio.Semaphore(PASSWORD_HASH_BULK_CONCURRENCY)
+
+    async def hash_chunk(chunk):
+        async with _bulk_hash_slots:
+            with PASSWORD_HASH_LATENCY.labels("bulk_hash").time():
+                return await run_in_hash_pool(hash_passwords, chunk, wait=True, timeout=None)
+
+    chunks = [passwords[i:i + PASSWORD_HASH_BULK_CHUNK_SIZE] for i in range(0, len(passwords), PASSWORD_HASH_BULK_CHUNK_SIZE)]
+    hashed_chunks = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks))
+    return [hashed for chunk in hashed_chunks for hashed in chunk]
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """
     Generates a JWT access token.
@@ -47,6 +301,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)  # Unique ID used for revocation
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 # CSRF Protection: Reject requests from unknown origins
@@ -64,28 +319,47 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        # Decode JWT token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Decode JWT token (verified claims are cached until the token expires)
+        payload = verify_access_token(token)
         user_id = payload.get("sub")  # Extract user ID from token
 
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
+        # Reject signed-out tokens
+        if await is_token_revoked(token_id(payload, token), token_expiry(payload)):
+            TOKEN_CACHE.delete(token_digest(token))
+            raise HTTPException(status_code=401, detail="Invalid token")
+
         # Validate ObjectId format
         if not ObjectId.is_valid(user_id):
             raise HTTPException(status_code=400, detail="Invalid user ID format")
 
-        # Fetch user from database using user_id
-        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1, "name": 1, "email": 1, "role": 1})
+        # Stateless tokens carry the principal; a role/password change or deletion bumps the
+        # user's token_version, which invalidates every token issued before it
+        if STATELESS_AUTH and "ver" in payload:
+            if await get_token_version(user_id) != payload["ver"]:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            return {"_id": ObjectId(user_id), "name": payload["name"], "email": payload["email"], "role": payload["role"]}
 
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+        # Serve the principal from cache when possible
+        user = PRINCIPAL_CACHE.get(user_id)
+        if user is None:
+            generation = PRINCIPAL_CACHE.generation
+
+            # Fetch user from database using user_id
+            user = await users_by_id.load(ObjectId(user_id))
+
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+
+            # Keep only the principal; ensure role exists
+            user = {"_id": user["_id"], "name": user["name"], "email": user["email"], "role": user.get("role", "user")}
 
-        # Ensure role exists
-        if "role" not in user:
-            user["role"] = "user"  # Default role
+            PRINCIPAL_CACHE.set(user_id, user, generation=generation)
 
-        return user
+        # Hand out a copy so handlers cannot alter the cached entry
+        return dict(user)
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
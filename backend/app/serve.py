@@ -0,0 +1,88 @@
+"""
+Production server entry point.
+
+Run from the backend folder:
+    python -m app.serve              # one worker per CPU core
+    python -m app.serve --reload     # development: single process, restarts on code changes
+
+Uses uvloop and httptools when installed (`uvicorn[standard]`), and falls back to
+asyncio and h11 otherwise.
+"""
+
+from app.logging_config import LOG_FILE, setup_logging
+from dotenv import load_dotenv
+import argparse
+import importlib.util
+import logging
+import os
+import uvicorn
+
+# Load environment variables
+load_dotenv()
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.cpu_count() or 1))
+SERVER_KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", 5))  # seconds an idle keep-alive connection stays open
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))  # seconds to finish in-flight requests on shutdown
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 2048))
+# Restart a worker after this many requests (0 disables), with jitter so workers do not restart together
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 0))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 0))
+
+APP = "app.main:app"
+
+logger = logging.getLogger(__name__)
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the FARM Skeleton backend.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Worker processes (default: CPU cores)")
+    parser.add_argument("--reload", action="store_true", help="Development only: single worker, restart on code changes")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = 1 if args.reload else max(args.workers, 1)
+
+    # Workers would each rotate the same log file; they log to the console instead
+    log_file = LOG_FILE
+    if workers > 1 and log_file:
+        os.environ["LOG_FILE"] = log_file = ""  # Inherited by the worker processes
+    setup_logging(log_file)
+
+    if workers > 1 and LOG_FILE:
+        logger.warning("LOG_FILE is ignored with several workers: logging to the console only")
+    if workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        logger.warning("PROMETHEUS_MULTIPROC_DIR is not set: /metrics only reports the worker serving the scrape")
+
+    loop, http = event_loop(), http_protocol()
+    logger.info("Starting server - Workers: %s - Loop: %s - HTTP: %s - Reload: %s", workers, loop, http, args.reload)
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=args.reload,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        backlog=SERVER_BACKLOG,
+        limit_max_requests=SERVER_MAX_REQUESTS or None,
+        limit_max_requests_jitter=SERVER_MAX_REQUESTS_JITTER,
+        log_config=None,  # Logging is set up by app.logging_config in every process
+        access_log=False,  # Access logs are written by RequestContextMiddleware
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Optional soft deletion of users (SOFT_DELETE=true).
+
+Deleting a user then only sets `deleted_at` (one small update), and a background
+task purges soft-deleted documents in batches, using the partial `deleted_at`
+index. Every user query goes through `not_deleted`, so soft-deleted users are
+invisible in both modes. Their email is released early when a new user (registered
+or imported) or an email change claims it.
+"""
+
+from datetime import datetime, timedelta, timezone
+from app.database import db, EMAIL_COLLATION
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SOFT_DELETE = os.getenv("SOFT_DELETE", "false").lower() == "true"
+USER_PURGE_INTERVAL = float(os.getenv("USER_PURGE_INTERVAL", 60))  # seconds between purge runs
+USER_PURGE_DELAY = float(os.getenv("USER_PURGE_DELAY", 0))  # seconds a soft-deleted user is kept
+USER_PURGE_BATCH_SIZE = int(os.getenv("USER_PURGE_BATCH_SIZE", 500))
+
+_purge_task = None
+
+
+def not_deleted(query: dict) -> dict:
+    """Restricts a user query to users that are not soft-deleted."""
+    return {**query, "deleted_at": None}
+
+async def delete_users(query: dict) -> int:
+    """Deletes (or soft-deletes) the users matching `query`; returns how many were deleted."""
+    query = not_deleted(query)
+    if SOFT_DELETE:
+        result = await db.users.update_many(query, {"$set": {"deleted_at": datetime.now(timezone.utc)}})
+        return result.modified_count
+    result = await db.users.delete_many(query)
+    return result.deleted_count
+
+async def release_email(email: str) -> bool:
+    """Purges the soft-deleted user holding `email`, if any, so the address can be reused."""
+    result = await db.users.delete_one({"email": email, "deleted_at": {"$ne": None}}, collation=EMAIL_COLLATION)
+    return result.deleted_count > 0
+
+async def release_emails(emails: list) -> int:
+    """Like `release_email` for several addresses at once; returns how many users were purged."""
+    result = await db.users.delete_many({"email": {"$in": emails}, "deleted_at": {"$ne": None}}, collation=EMAIL_COLLATION)
+    return result.deleted_count
+
+async def purge_deleted_users() -> int:
+    """Removes soft-deleted users in batches; returns how many were removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=USER_PURGE_DELAY)
+    purged = 0
+    while True:
+        batch = [
+            user["_id"]
+            async for user in db.users.find({"deleted_at": {"$lte": cutoff}}, {"_id": 1}).limit(USER_PURGE_BATCH_SIZE)
+        ]
+        if not batch:
+            return purged
+        result = await db.users.delete_many({"_id": {"$in": batch}, "deleted_at": {"$lte": cutoff}})
+        purged += result.deleted_count
+
+async def _purge_loop():
+    while True:
+        try:
+            purged = await purge_deleted_users()
+            if purged:
+                logger.info("Purged soft-deleted users: %s", purged)
+        except Exception:
+            logger.exception("Soft-deleted user purge failed")
+        await asyncio.sleep(USER_PURGE_INTERVAL)
+
+def start_purge_task():
+    """Starts the background purge (only in soft-delete mode)."""
+    global _purge_task
+    if SOFT_DELETE and _purge_task is None:
+        _purge_task = asyncio.create_task(_purge_loop())
+
+async def stop_purge_task():
+    global _purge_task
+    if _purge_task is not None:
+        _purge_task.cancel()
+        try:
+            await _purge_task
+        except asyncio.CancelledError:
+            pass
+        _purge_task = None
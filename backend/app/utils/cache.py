@@ -0,0 +1,100 @@
+"""
+Bounded in-process LRU cache with per-entry expiry and hit/miss/eviction counters.
+"""
+
+from collections import OrderedDict
+import time
+
+# Registry of named caches so their counters can be reported together
+CACHES = {}
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after a time-to-live.
+
+    Not thread-safe: instances are meant to be used from the event loop only.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Bumped on every invalidation, see `set(..., generation=...)`
+        self.generation = 0
+        self._data = OrderedDict()
+        CACHES[name] = self
+
+    def get(self, key, default=None):
+        """Returns the cached value for `key`, or `default` if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float = None, generation: int = None):
+        """
+        Stores `value` under `key` for `ttl` seconds (defaults to the cache TTL).
+
+        If `generation` is given and an invalidation happened since it was read,
+        the value is considered stale and is not stored.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        """Removes `key` from the cache."""
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        """Removes several keys from the cache at once."""
+        self.generation += 1
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        self.generation += 1
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,16 +1,215 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from fastapi import Request, HTTPException
-from slowapi.errors import RateLimitExceeded
+"""
+Request rate limiting with per-route policies, applied as FastAPI dependencies.
+
+Each policy has a limit per period, an algorithm and a key:
+
+- `token_bucket` allows bursts up to the limit and refills continuously.
+- `sliding_window` weights the previous fixed window by how much of it still
+  overlaps the sliding window (constant memory per key).
+- Keys are the client IP, or the authenticated user (read from the bearer token
+  without touching the database; invalid tokens fall back to the IP).
+
+State is kept in a bounded in-process LRU by default. With several workers, set
+RATE_LIMIT_STORAGE=mongo to share counters through the `rate_limits` collection;
+the shared store counts every policy with the sliding-window algorithm. Requests
+already known to be over their limit are rejected locally, so a 429 costs no
+database or bcrypt work.
+"""
+
+from fastapi import HTTPException, Request
+from jose import JWTError
+from pymongo import ReturnDocument
+from datetime import datetime, timezone
+from app.database import db
+from app.metrics import RATE_LIMITED_REQUESTS
+from app.security import verify_access_token
+from app.utils.cache import TTLCache
+import logging
+import math
 import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Disabled by default in tests
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false" if os.getenv("TEST_ENV") == "true" else "true").lower() == "true"
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory")  # memory or mongo
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+
+ERROR_429_MESSAGE = "Too many requests. Try again later."
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# name: (default limit, algorithm, key); limits can be overridden with RATE_LIMIT_<NAME>, e.g. "5/minute"
+DEFAULT_POLICIES = {
+    "signin": ("10/minute", "sliding_window", "ip"),
+    "refresh": ("30/minute", "sliding_window", "ip"),
+    "register": ("10/minute", "sliding_window", "ip"),
+    "read": ("120/minute", "token_bucket", "user"),
+    "write": ("30/minute", "token_bucket", "user"),
+    "bulk": ("10/minute", "sliding_window", "user"),
+}
+
+# Local state: token buckets, window counters and "blocked until" markers
+RATE_LIMIT_CACHE = TTLCache("rate_limits", maxsize=RATE_LIMIT_MAX_KEYS, ttl=60)
+
+
+def parse_limit(value: str) -> tuple:
+    """Parses "N/period" (period: second, minute, hour or day) into (limit, seconds)."""
+    count, _, period = value.partition("/")
+    if period not in PERIODS or not count.strip().isdigit():
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return int(count), PERIODS[period]
+
+
+class RateLimitPolicy:
+    """A named limit of `limit` requests per `period` seconds."""
+
+    def __init__(self, name: str, limit: str, algorithm: str = "token_bucket", key: str = "ip"):
+        if algorithm not in ("token_bucket", "sliding_window"):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        if key not in ("ip", "user"):
+            raise ValueError(f"Unknown rate limit key: {key}")
+        self.name = name
+        self.limit, self.period = parse_limit(limit)
+        self.algorithm = algorithm
+        self.key = key
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.limit / self.period
+
+
+POLICIES = {
+    name: RateLimitPolicy(name, os.getenv(f"RATE_LIMIT_{name.upper()}", limit), algorithm, key)
+    for name, (limit, algorithm, key) in DEFAULT_POLICIES.items()
+}
+
+
+# **Algorithms (local state)**
+def take_token(policy: RateLimitPolicy, key: str) -> float:
+    """Token bucket: consumes one token, or returns the seconds until one is available."""
+    now = time.monotonic()
+    state = RATE_LIMIT_CACHE.get(key)
+    tokens = policy.limit if state is None else min(policy.limit, state[0] + (now - state[1]) * policy.rate)
+
+    retry_after = 0.0
+    if tokens >= 1:
+        tokens -= 1
+    else:
+        retry_after = (1 - tokens) / policy.rate
+    # An untouched bucket is full again after one period, so the entry can expire then
+    RATE_LIMIT_CACHE.set(key, (tokens, now), ttl=policy.period)
+    return retry_after
+
+def window_retry_after(policy: RateLimitPolicy, previous: int, current: int, elapsed: float) -> float:
+    """Seconds until the weighted count of a sliding window drops below the limit (always positive)."""
+    if current >= policy.limit or previous == 0:
+        return (1 - elapsed) * policy.period
+    # Exactly at the limit the count only drops below it an instant later, so never return 0 (allowed)
+    return max((1 - (policy.limit - current) / previous) - elapsed, 1e-3 / policy.period) * policy.period
+
+def count_in_window(policy: RateLimitPolicy, key: str) -> float:
+    """Sliding window: counts one request, or returns the seconds until one is allowed."""
+    now = time.time()
+    window, elapsed = divmod(now / policy.period, 1)
+    window = int(window)
+    current = RATE_LIMIT_CACHE.get((key, window), 0)
+    previous = RATE_LIMIT_CACHE.get((key, window - 1), 0)
+
+    if previous * (1 - elapsed) + current >= policy.limit:
+        return window_retry_after(policy, previous, current, elapsed)
+    RATE_LIMIT_CACHE.set((key, window), current + 1, ttl=2 * policy.period)
+    return 0.0
+
+
+# **Shared store (MongoDB)**
+async def ensure_rate_limit_indexes():
+    """Creates the TTL index that prunes expired windows (only with the shared store)."""
+    if RATE_LIMIT_STORAGE == "mongo":
+        await db.rate_limits.create_index("exp", expireAfterSeconds=0)
+
+async def count_in_shared_window(policy: RateLimitPolicy, key: str) -> float:
+    """Sliding window counted in the `rate_limits` collection, shared by every worker."""
+    now = time.time()
+    window, elapsed = divmod(now / policy.period, 1)
+    window = int(window)
+
+    document = await db.rate_limits.find_one_and_update(
+        {"_id": f"{key}:{window}"},
+        {
+            "$inc": {"count": 1},
+            "$setOnInsert": {"exp": datetime.fromtimestamp((window + 2) * policy.period, tz=timezone.utc)},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    current = document["count"] - 1  # Requests before this one
+
+    # A closed window no longer changes, so its count is cached locally
+    previous = RATE_LIMIT_CACHE.get((key, window - 1))
+    if previous is None:
+        previous_document = await db.rate_limits.find_one({"_id": f"{key}:{window - 1}"}, {"count": 1})
+        previous = previous_document["count"] if previous_document else 0
+        RATE_LIMIT_CACHE.set((key, window - 1), previous, ttl=policy.period)
+
+    if previous * (1 - elapsed) + current >= policy.limit:
+        return window_retry_after(policy, previous, current, elapsed)
+    return 0.0
+
+
+# **Dependency**
+def client_key(request: Request, policy: RateLimitPolicy) -> str:
+    """Returns the rate limit key of the request: the user ID, or the client IP."""
+    if policy.key == "user":
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                subject = verify_access_token(token).get("sub")
+            except JWTError:
+                subject = None
+            if subject:
+                return f"{policy.name}:user:{subject}"
+    host = request.client.host if request.client else "unknown"
+    return f"{policy.name}:ip:{host}"
+
+async def check_rate_limit(request: Request, policy: RateLimitPolicy):
+    """Raises 429 (with Retry-After) when the request exceeds the policy."""
+    key = client_key(request, policy)
+
+    blocked_until = RATE_LIMIT_CACHE.get(("blocked", key))
+    if blocked_until is not None:
+        retry_after = blocked_until - time.monotonic()
+    elif RATE_LIMIT_STORAGE == "mongo":
+        retry_after = await count_in_shared_window(policy, key)
+    elif policy.algorithm == "token_bucket":
+        retry_after = take_token(policy, key)
+    else:
+        retry_after = count_in_window(policy, key)
+
+    if retry_after > 0:
+        if blocked_until is None:
+            RATE_LIMIT_CACHE.set(("blocked", key), time.monotonic() + retry_after, ttl=retry_after)
+            logger.warning("Rate limit exceeded - Policy: %s - Key: %s", policy.name, key)
+        RATE_LIMITED_REQUESTS.labels(policy.name).inc()
+        raise HTTPException(
+            status_code=429,
+            detail=ERROR_429_MESSAGE,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+def rate_limit(name: str):
+    """
+    Returns a dependency enforcing the named policy.
+
+    Use it in the route decorator (`dependencies=[Depends(rate_limit("read"))]`) so it
+    runs before the route's own dependencies, such as the user lookup.
+    """
+    policy = POLICIES[name]
 
-# Disable rate limiting in tests
-if os.getenv("TEST_ENV") == "true":
-    limiter = Limiter(key_func=get_remote_address, enabled=False)  # ✅ Rate limit disabled in test mode
-else:
-    limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])  # ✅ Rate limit enabled normally
+    async def dependency(request: Request):
+        if RATE_LIMIT_ENABLED:
+            await check_rate_limit(request, policy)
 
-# Custom exception handler for 429 Too Many Requests
-def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
-    """Handles 429 Too Many Requests errors."""
-    raise HTTPException(status_code=429, detail="Too many requests. Try again later.")
+    return dependency
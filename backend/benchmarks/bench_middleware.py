@@ -0,0 +1,85 @@
+"""
+Compares the per-request overhead of the old BaseHTTPMiddleware-style `log_requests`
+with the pure ASGI `RequestContextMiddleware` on a small JSON response.
+
+Run from the backend folder:
+    python -m benchmarks.bench_middleware [requests]
+"""
+
+from fastapi import FastAPI, Request
+from app.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, route_template
+from app.middleware import RequestContextMiddleware
+import asyncio
+import httpx
+import logging
+import sys
+import time
+
+logger = logging.getLogger("benchmarks.access")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"message": "pong", "items": [1, 2, 3]}
+
+    return app
+
+def base_http_middleware_app() -> FastAPI:
+    """The previous `@app.middleware("http")` implementation."""
+    app = build_app()
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.perf_counter()
+        in_flight = REQUESTS_IN_FLIGHT.labels(request.method)
+        in_flight.inc()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            in_flight.dec()
+            duration = time.perf_counter() - start_time
+            route = route_template(request.scope)
+            REQUEST_LATENCY.labels(request.method, route, status_code).observe(duration)
+
+        logger.info(
+            "Request: %s %s | Status: %s | Duration: %.2fms", request.method, request.url, status_code, duration * 1000,
+            extra={"method": request.method, "route": route, "status_code": status_code, "duration_ms": round(duration * 1000, 2)},
+        )
+        return response
+
+    return app
+
+def asgi_middleware_app() -> FastAPI:
+    app = build_app()
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+async def run(app: FastAPI, requests: int) -> float:
+    """Returns requests per second for `requests` sequential GET /ping calls."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # Warm-up
+            await client.get("/ping")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return requests / (time.perf_counter() - start)
+
+async def main(requests: int):
+    logging.disable(logging.INFO)  # Measure middleware overhead, not log I/O
+    baseline = await run(build_app(), requests)
+    base_http = await run(base_http_middleware_app(), requests)
+    asgi = await run(asgi_middleware_app(), requests)
+
+    print(f"no middleware:          {baseline:8.0f} req/s")
+    print(f"BaseHTTPMiddleware:     {base_http:8.0f} req/s")
+    print(f"pure ASGI middleware:   {asgi:8.0f} req/s ({asgi / base_http:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
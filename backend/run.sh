@@ -1 +1 @@
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
+python -m app.serve "$@"
\ No newline at end of file
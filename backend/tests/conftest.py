@@ -0,0 +1,16 @@
+import asyncio
+import pytest
+from app.database import close_mongo_connection
+
+
+@pytest.fixture()
+def run():
+    """Runs a coroutine on a new event loop, with a MongoDB client created for that loop."""
+    def run(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                close_mongo_connection()
+        return asyncio.run(main())
+    return run
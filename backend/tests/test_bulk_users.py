@@ -0,0 +1,95 @@
+import pytest
+import requests
+from app.database import db
+
+# Base API URLs
+BULK_UPDATE_URL = "http://localhost:8000/api/users/bulk-update"
+BULK_DELETE_URL = "http://localhost:8000/api/users/bulk-delete"
+SIGNIN_URL = "http://localhost:8000/auth/signin"
+REGISTER_URL = "http://localhost:8000/api/users"
+
+# Test Users
+ADMIN = {"name": "Admin User", "email": "admin@example.com", "password": "AdminPass@123", "role": "admin"}
+TEST_USERS = [
+    {"name": f"Test User {i}", "email": f"testuser{i}@example.com", "password": "Password123!"} for i in range(4)
+]
+NON_EXISTENT_ID = "65a7b5c9f1d3c9e1b2a3d4e5"
+
+# Store authentication tokens and user IDs
+TOKENS = {}
+USER_IDS = []
+
+# Setup: Register users, get their IDs and JWT tokens
+@pytest.fixture(scope="module", autouse=True)
+def setup_users():
+    requests.post(REGISTER_URL, json=ADMIN)
+    for user in TEST_USERS:
+        response = requests.post(REGISTER_URL, json=user)
+        if response.status_code == 201:
+            USER_IDS.append(response.json()["id"])
+
+    for user in (ADMIN, TEST_USERS[-1]):
+        response = requests.post(SIGNIN_URL, json={"email": user["email"], "password": user["password"]})
+        assert response.status_code == 200
+        TOKENS[user["email"]] = response.json()["access_token"]
+
+    yield  # Run tests
+
+    # Cleanup test users directly from MongoDB
+    db.users.delete_many({})  # Deletes all test users
+
+
+def admin_headers():
+    return {"Authorization": f"Bearer {TOKENS[ADMIN['email']]}"}
+
+
+# POSITIVE TEST CASES
+def test_bulk_update_by_ids():
+    """Changes the role of several users at once and reports per-id outcomes."""
+    body = {"ids": USER_IDS[:2] + ["invalid123", NON_EXISTENT_ID], "update": {"role": "tester"}}
+    response = requests.post(BULK_UPDATE_URL, json=body, headers=admin_headers())
+
+    assert response.status_code == 200
+    statuses = {result["id"]: result["status"] for result in response.json()["results"]}
+    assert statuses == {USER_IDS[0]: "updated", USER_IDS[1]: "updated", "invalid123": "invalid_id", NON_EXISTENT_ID: "not_found"}
+
+
+def test_bulk_update_by_filter():
+    """Updates every user matching a filter and reports counts only."""
+    body = {"filter": {"role": "tester"}, "update": {"name": "Renamed Tester"}}
+    response = requests.post(BULK_UPDATE_URL, json=body, headers=admin_headers())
+
+    assert response.status_code == 200
+    assert response.json() == {"matched": 2, "modified": 2, "results": []}
+
+
+def test_bulk_delete_by_filter():
+    """Deletes every user matching a filter and reports counts only."""
+    response = requests.post(BULK_DELETE_URL, json={"filter": {"role": "tester"}}, headers=admin_headers())
+
+    assert response.status_code == 200
+    assert response.json() == {"matched": 2, "modified": 2, "results": []}
+    for user_id in USER_IDS[:2]:
+        assert requests.get(f"{REGISTER_URL}/{user_id}", headers=admin_headers()).status_code == 404
+
+
+# NEGATIVE TEST CASES
+@pytest.mark.parametrize("url, body, expected_status, expected_error", [
+    (BULK_UPDATE_URL, {"ids": [NON_EXISTENT_ID], "update": {"name": "<script>"}}, 400, "Invalid characters in name"),
+    (BULK_UPDATE_URL, {"ids": [NON_EXISTENT_ID], "update": {}}, 400, "Nothing to update"),
+    (BULK_UPDATE_URL, {"update": {"role": "admin"}}, 400, "Provide either ids or filter"),
+    (BULK_DELETE_URL, {"filter": {}}, 400, "Filter must not be empty"),
+])
+def test_bulk_negative(url, body, expected_status, expected_error):
+    """Tests bulk request validation."""
+    response = requests.post(url, json=body, headers=admin_headers())
+    assert response.status_code == expected_status
+    assert expected_error in response.json()["detail"]
+
+
+@pytest.mark.parametrize("url", [BULK_UPDATE_URL, BULK_DELETE_URL])
+def test_bulk_requires_admin(url):
+    """Non-admin users cannot run bulk operations."""
+    headers = {"Authorization": f"Bearer {TOKENS[TEST_USERS[-1]['email']]}"}  # Not deleted by the tests above
+    response = requests.post(url, json={"ids": USER_IDS, "update": {"role": "admin"}}, headers=headers)
+    assert response.status_code == 403
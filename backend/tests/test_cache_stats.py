@@ -0,0 +1,59 @@
+import pytest
+import requests
+from app.database import db
+
+# Base API URLs
+STATS_URL = "http://localhost:8000/stats/cache"
+SIGNIN_URL = "http://localhost:8000/auth/signin"
+REGISTER_URL = "http://localhost:8000/api/users"
+
+# Test Users
+TEST_USERS = [
+    {"name": "Admin User", "email": "admin@example.com", "password": "AdminPass@123", "role": "admin"},
+    {"name": "Regular User", "email": "user@example.com", "password": "Password123!"},
+]
+
+# Store authentication tokens
+TOKENS = {}
+
+# Setup: Register users and obtain JWT tokens
+@pytest.fixture(scope="module", autouse=True)
+def setup_users():
+    for user in TEST_USERS:
+        requests.post(REGISTER_URL, json=user)
+
+    for user in TEST_USERS:
+        response = requests.post(SIGNIN_URL, json={"email": user["email"], "password": user["password"]})
+        assert response.status_code == 200
+        TOKENS[user["email"]] = response.json()["access_token"]
+
+    yield  # Run tests
+
+    # Cleanup test users directly from MongoDB
+    db.users.delete_many({})  # Deletes all test users
+
+
+# POSITIVE TEST CASES
+def test_cache_stats_admin():
+    """Admins can read the cache counters."""
+    headers = {"Authorization": f"Bearer {TOKENS['admin@example.com']}"}
+    response = requests.get(STATS_URL, headers=headers)
+
+    assert response.status_code == 200
+    stats = response.json()["principals"]
+    for counter in ("hits", "misses", "evictions", "size"):
+        assert counter in stats
+
+
+# NEGATIVE TEST CASES
+@pytest.mark.parametrize("email, expected_status, expected_error", [
+    (None, 401, "Not authenticated"),  # No token
+    ("user@example.com", 403, "Forbidden: Access denied"),  # Non-admin user
+])
+def test_cache_stats_negative(email, expected_status, expected_error):
+    """Tests cache stats access control."""
+    headers = {"Authorization": f"Bearer {TOKENS[email]}"} if email else {}
+    response = requests.get(STATS_URL, headers=headers)
+
+    assert response.status_code == expected_status
+    assert expected_error in response.json()["detail"]
@@ -1,7 +1,11 @@
+import asyncio
 import pytest
 import requests
 import string
 import random
+import threading
+from fastapi import HTTPException
+from app import security
 from app.database import db
 
 # Base API URL
@@ -40,6 +44,19 @@ def test_create_user_positive(payload, expected_status):
     assert "id" in response.json()
 
 # NEGATIVE TEST CASES
+@pytest.mark.parametrize("duplicate_email", [
+    "dupe@example.com",  # Same email
+    "DUPE@Example.com",  # Same email, different case
+])
+def test_create_user_duplicate_email(duplicate_email):
+    """Tests that the unique email index rejects duplicate registrations"""
+    response = requests.post(BASE_URL, json={"name": "Original", "email": "dupe@example.com", "password": "Pass1234%"})
+    assert response.status_code == 201
+
+    response = requests.post(BASE_URL, json={"name": "Duplicate", "email": duplicate_email, "password": "Pass1234%"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
 @pytest.mark.parametrize("payload, expected_status, expected_error", [
     ({"email": "missingname@example.com", "password": "Pass1234%"}, 422, "Field required"),
     ({"name": "NoEmail", "password": "Pass1234%"}, 422, "Field required"),
@@ -88,3 +105,37 @@ def test_create_user_security(payload, expected_status):
     """Tests user creation against security vulnerabilities"""
     response = requests.post(BASE_URL, json=payload)
     assert response.status_code == expected_status
+
+
+# LOAD SHEDDING TEST CASES (run in-process)
+def test_hash_pool_rejects_when_saturated(monkeypatch):
+    """Password hashing returns 503 once every worker and queue slot is taken, unless the caller waits."""
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(security, "PASSWORD_HASH_QUEUE_SIZE", 0)
+    security.shutdown_hash_executor()  # Start from an empty pool sized as above
+    release = threading.Event()
+
+    async def saturate():
+        busy = asyncio.create_task(security.run_in_hash_pool(release.wait))
+        await asyncio.sleep(0.01)  # The only slot is now taken
+        rejected = None
+        try:
+            await security.run_in_hash_pool(str, "rejected")
+        except HTTPException as e:
+            rejected = e
+        waiting = asyncio.create_task(security.run_in_hash_pool(str, "queued", wait=True))
+        await asyncio.sleep(0.01)
+        queued_before_release = waiting.done()
+        release.set()
+        return rejected, queued_before_release, await busy, await waiting
+
+    try:
+        rejected, queued_before_release, busy, waiting = asyncio.run(saturate())
+    finally:
+        release.set()
+        security.shutdown_hash_executor()
+
+    assert rejected.status_code == 503
+    assert rejected.detail == "Server busy. Try again later."
+    assert not queued_before_release  # wait=True queues for a slot instead of failing
+    assert (busy, waiting) == (True, "queued")
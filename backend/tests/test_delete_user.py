@@ -1,6 +1,10 @@
 import pytest
 import requests
+from bson import ObjectId
+from fastapi import HTTPException
+from app import soft_delete
 from app.database import db
+from app.routes.users import delete_user, get_user
 
 # Base API URLs
 BASE_URL = "http://localhost:8000/api/users"
@@ -117,6 +121,49 @@ def test_delete_user_security(user_id, auth_token, expected_status, expected_err
     assert expected_error in response.json()["detail"]
 
 
+# **Soft Delete Test Cases** (run in-process with SOFT_DELETE enabled)
+async def status_of(call) -> int:
+    """Returns 200 if a route call succeeds, or the status code of its HTTPException."""
+    try:
+        await call
+        return 200
+    except HTTPException as e:
+        return e.status_code
+
+
+def test_soft_delete_hides_user_until_purged(monkeypatch, run):
+    """A soft-deleted user is hidden with the usual 404/403 codes, then removed by the purge."""
+    monkeypatch.setattr(soft_delete, "SOFT_DELETE", True)
+    admin = {"_id": ObjectId(), "name": "Soft Admin", "email": "softadmin@example.com", "role": "admin"}
+    emails = ["soft@example.com", "kept@example.com"]
+
+    async def soft_delete_and_purge():
+        deleted_id, kept_id = (await db.users.insert_many(
+            [{"name": "Soft User", "email": email, "password": "hash", "role": "user"} for email in emails]
+        )).inserted_ids
+        kept = {"_id": kept_id, "name": "Soft User", "email": emails[1], "role": "user"}
+        try:
+            statuses = [await status_of(delete_user(None, str(deleted_id), admin))]
+            stored = await db.users.find_one({"_id": deleted_id})
+            statuses += [
+                await status_of(get_user(None, str(deleted_id), admin)),  # Hidden from reads
+                await status_of(delete_user(None, str(deleted_id), admin)),  # Already deleted
+                await status_of(delete_user(None, str(deleted_id), kept)),  # Non-admin: still "not found"
+                await status_of(delete_user(None, str(admin["_id"]), kept)),  # Non-admin on a missing user
+                await status_of(delete_user(None, str(kept_id), {**kept, "_id": ObjectId()})),  # Someone else's profile
+            ]
+            purged = await soft_delete.purge_deleted_users()
+            return statuses, stored, purged, await db.users.find_one({"_id": deleted_id})
+        finally:
+            await db.users.delete_many({"email": {"$in": emails}})
+
+    statuses, stored, purged, after_purge = run(soft_delete_and_purge())
+    assert statuses == [200, 404, 404, 404, 404, 403]
+    assert stored["deleted_at"] is not None  # Only marked as deleted
+    assert purged == 1
+    assert after_purge is None
+
+
 # # **Brute Force Protection Test**
 # def test_brute_force_protection():
 #     """Simulates brute force attack and checks rate limiting."""
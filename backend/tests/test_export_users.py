@@ -0,0 +1,87 @@
+import json
+import pytest
+import requests
+from app.database import db
+
+# Base API URLs
+EXPORT_URL = "http://localhost:8000/api/users/export"
+SIGNIN_URL = "http://localhost:8000/auth/signin"
+REGISTER_URL = "http://localhost:8000/api/users"
+
+# Test Users
+TEST_USERS = [
+    {"name": "Admin User", "email": "admin@example.com", "password": "AdminPass@123", "role": "admin"},
+    {"name": "User Two", "email": "user2@example.com", "password": "Password123!"},
+    {"name": "User Three", "email": "user3@example.com", "password": "Password123!"},
+]
+
+# Store Authentication Tokens
+TOKENS = {}
+
+# Setup: Register users and obtain JWT tokens
+@pytest.fixture(scope="module", autouse=True)
+def setup_users():
+    for user in TEST_USERS:
+        requests.post(REGISTER_URL, json=user)
+
+    for user in TEST_USERS[:2]:
+        response = requests.post(SIGNIN_URL, json={"email": user["email"], "password": user["password"]})
+        assert response.status_code == 200
+        TOKENS[user["email"]] = response.json()["access_token"]
+
+    yield  # Run tests
+
+    # Cleanup test users directly from MongoDB
+    db.users.delete_many({})  # Deletes all test users
+
+
+def admin_headers():
+    return {"Authorization": f"Bearer {TOKENS['admin@example.com']}"}
+
+
+# POSITIVE TEST CASES
+def test_export_users_ndjson():
+    """Exports every user as NDJSON without password hashes."""
+    response = requests.get(EXPORT_URL, headers=admin_headers())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines() if line]
+    assert {row["email"] for row in rows} == {user["email"] for user in TEST_USERS}
+    assert all("password" not in row for row in rows)
+
+
+def test_export_users_csv_with_projection():
+    """Exports only the requested columns as CSV."""
+    response = requests.get(f"{EXPORT_URL}?format=csv&fields=name,email", headers=admin_headers())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    lines = response.text.splitlines()
+    assert lines[0] == "name,email"
+    assert len(lines) == len(TEST_USERS) + 1
+
+
+@pytest.mark.parametrize("query_params, expected_rows", [
+    ("?created_after=2000-01-01T00:00:00Z", len(TEST_USERS)),  # Everyone created after 2000
+    ("?created_before=2000-01-01T00:00:00Z", 0),  # Nobody created before 2000
+])
+def test_export_users_created_range(query_params, expected_rows):
+    """Filters the export by creation date."""
+    response = requests.get(f"{EXPORT_URL}{query_params}", headers=admin_headers())
+    assert response.status_code == 200
+    assert len([line for line in response.text.splitlines() if line]) == expected_rows
+
+
+# NEGATIVE TEST CASES
+@pytest.mark.parametrize("email, query_params, expected_status", [
+    (None, "", 401),  # No token
+    ("user2@example.com", "", 403),  # Non-admin user
+    ("admin@example.com", "?fields=password", 400),  # Password hashes are never exported
+    ("admin@example.com", "?format=xml", 422),  # Unsupported format
+])
+def test_export_users_negative(email, query_params, expected_status):
+    """Tests export access control and parameter validation."""
+    headers = {"Authorization": f"Bearer {TOKENS[email]}"} if email else {}
+    response = requests.get(f"{EXPORT_URL}{query_params}", headers=headers)
+    assert response.status_code == expected_status
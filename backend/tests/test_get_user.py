@@ -58,6 +58,39 @@ def test_get_user_positive(email, expected_status):
     assert response.json()["email"] == email
 
 
+def test_get_users_batch():
+    """Fetches several users at once and reports missing and forbidden IDs."""
+    missing_id = "65a7b5c9f1d3c9e1b2a3d4e5"
+    ids = ",".join([*USER_IDS.values(), missing_id])
+
+    response = requests.get(BASE_URL, params={"ids": ids}, headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [user["id"] for user in body["found"]] == list(USER_IDS.values())
+    assert body["missing"] == [missing_id]
+    assert body["forbidden"] == []
+
+    # Non-admins only get their own profile
+    response = requests.post(SIGNIN_URL, json={"email": TEST_USERS[1]["email"], "password": TEST_USERS[1]["password"]})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = requests.get(BASE_URL, params={"ids": ids}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [user["id"] for user in body["found"]] == [USER_IDS[TEST_USERS[1]["email"]]]
+    assert body["missing"] == [missing_id]
+    assert len(body["forbidden"]) == 2
+
+
+@pytest.mark.parametrize("ids", [
+    "invalid123",  # Invalid user ID format
+    "' OR 1=1 --",  # SQL Injection Attempt
+])
+def test_get_users_batch_invalid_id(ids):
+    response = requests.get(BASE_URL, params={"ids": ids}, headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid user ID format"
+
+
 # NEGATIVE TEST CASES
 @pytest.mark.parametrize("user_id, expected_status, expected_error", [
     # ("non_existent_id", 404, "User not found"),  # Non-existent user
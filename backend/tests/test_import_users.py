@@ -0,0 +1,104 @@
+import json
+import pytest
+import requests
+from datetime import datetime, timezone
+from app.database import db
+from app.models import UserCreate
+from app.routes.bulk import import_batch
+
+# Base API URLs
+IMPORT_URL = "http://localhost:8000/api/users/import"
+SIGNIN_URL = "http://localhost:8000/auth/signin"
+REGISTER_URL = "http://localhost:8000/api/users"
+
+# Test Users
+TEST_USERS = [
+    {"name": "Admin User", "email": "admin@example.com", "password": "AdminPass@123", "role": "admin"},
+    {"name": "Regular User", "email": "user@example.com", "password": "Password123!"},
+]
+
+# Store Authentication Tokens
+TOKENS = {}
+
+# Setup: Register users and obtain JWT tokens
+@pytest.fixture(scope="module", autouse=True)
+def setup_users():
+    for user in TEST_USERS:
+        requests.post(REGISTER_URL, json=user)
+
+    for user in TEST_USERS:
+        response = requests.post(SIGNIN_URL, json={"email": user["email"], "password": user["password"]})
+        assert response.status_code == 200
+        TOKENS[user["email"]] = response.json()["access_token"]
+
+    yield  # Run tests
+
+    # Cleanup test users directly from MongoDB
+    db.users.delete_many({})  # Deletes all test users
+
+
+def admin_headers(**extra):
+    return {"Authorization": f"Bearer {TOKENS['admin@example.com']}", **extra}
+
+
+# POSITIVE TEST CASES
+def test_import_users_ndjson():
+    """Imports an NDJSON stream and reports per-row results."""
+    rows = [{"name": f"Imported {i}", "email": f"imported{i}@example.com", "password": "Pass1234%"} for i in range(5)]
+    body = "\n".join(json.dumps(row) for row in rows)
+    response = requests.post(IMPORT_URL, data=body, headers=admin_headers(**{"Content-Type": "application/x-ndjson"}))
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 5
+    assert [result["status"] for result in data["results"]] == ["created"] * 5
+
+    # Imported users can sign in
+    response = requests.post(SIGNIN_URL, json={"email": rows[0]["email"], "password": rows[0]["password"]})
+    assert response.status_code == 200
+
+
+def test_import_users_json_array_mixed_rows():
+    """Imports a JSON array containing valid, duplicate and invalid rows."""
+    rows = [
+        {"name": "Fresh User", "email": "fresh@example.com", "password": "Pass1234%"},
+        {"name": "Duplicate", "email": "admin@example.com", "password": "Pass1234%"},
+        {"name": "Weak Password", "email": "weak@example.com", "password": "password"},
+    ]
+    response = requests.post(IMPORT_URL, json=rows, headers=admin_headers())
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["duplicates"], data["invalid"]) == (1, 1, 1)
+    assert [result["status"] for result in data["results"]] == ["created", "duplicate", "invalid"]
+
+
+# NEGATIVE TEST CASES
+@pytest.mark.parametrize("email, body, expected_status", [
+    (None, [], 401),  # No token
+    ("user@example.com", [], 403),  # Non-admin user
+    ("admin@example.com", {"name": "Not a list"}, 400),  # Body is not an array
+])
+def test_import_users_negative(email, body, expected_status):
+    """Tests import access control and body validation."""
+    headers = {"Authorization": f"Bearer {TOKENS[email]}"} if email else {}
+    response = requests.post(IMPORT_URL, json=body, headers=headers)
+    assert response.status_code == expected_status
+
+
+def test_import_reuses_soft_deleted_email(run):
+    """Importing the email of a soft-deleted user replaces that user, like registration does."""
+    email = "reimported@example.com"
+    row = UserCreate(name="Reimported User", email=email, password="Password123!")
+
+    async def import_over_soft_deleted():
+        await db.users.insert_one({"name": "Old User", "email": email, "password": "hash", "deleted_at": datetime.now(timezone.utc)})
+        try:
+            results = await import_batch([(0, row), (1, row)])
+            return results, await db.users.count_documents({"email": email})
+        finally:
+            await db.users.delete_many({"email": email})
+
+    results, stored = run(import_over_soft_deleted())
+    assert [result["status"] for result in results] == ["created", "duplicate"]
+    assert stored == 1
@@ -1,7 +1,13 @@
 import pytest
 import requests
 import time
+from datetime import datetime, timezone
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from typing import List
+from app import responses
 from app.database import db
+from app.models import UserResponse
 
 # Base API URLs
 BASE_URL = "http://localhost:8000/api/users"
@@ -53,6 +59,65 @@ def test_list_users_positive(query_params, expected_status):
     assert isinstance(response.json(), list)
 
 
+def test_list_users_cursor_pagination():
+    """Walks every page with the X-Next-Cursor header and checks no user is skipped or repeated."""
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    seen = []
+    cursor = None
+
+    while True:
+        params = {"limit": 1, "after": cursor} if cursor else {"limit": 1}
+        response = requests.get(BASE_URL, params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(user["id"] for user in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == len(TEST_USERS)
+
+
+def test_list_users_total_count():
+    """Returns the total in X-Total-Count, per role filter, unless count=false."""
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    response = requests.get(BASE_URL, params={"limit": 1}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == str(len(TEST_USERS))
+
+    response = requests.get(BASE_URL, params={"role": "admin"}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert response.headers["X-Total-Count"] == "1"
+
+    response = requests.get(BASE_URL, params={"count": "false"}, headers=headers)
+    assert response.status_code == 200
+    assert "X-Total-Count" not in response.headers
+
+
+def test_fast_responses_match_default_serialization(monkeypatch):
+    """FAST_RESPONSES renders the same JSON, status and headers as FastAPI's own serialization."""
+    app = FastAPI()
+    users = [
+        UserResponse.model_construct(id="65a7b5c9f1d3c9e1b2a3d4e5", name="Zoë Ünicode", email="zoe@example.com",
+                                     created_at=datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)),
+        UserResponse.model_construct(id="65a7b5c9f1d3c9e1b2a3d4e6", name="Naive Date", email="naive@example.com",
+                                     created_at=datetime(2025, 1, 2, 3, 4, 5)),
+    ]
+
+    @app.get("/users", response_model=List[UserResponse])
+    async def list_users(response: Response):
+        response.headers["X-Total-Count"] = "2"
+        return responses.model_response(users, response=response)
+
+    rendered = {}
+    for fast in (False, True):
+        monkeypatch.setattr(responses, "FAST_RESPONSES", fast)
+        response = TestClient(app).get("/users")
+        rendered[fast] = (response.status_code, response.json(), response.headers["X-Total-Count"], response.headers["content-type"])
+
+    assert rendered[True] == rendered[False]
+
+
 # NEGATIVE TEST CASES
 @pytest.mark.parametrize("query_params, expected_status, expected_error,", [
     ("", 401, "Not authenticated"),  # No Token
@@ -84,6 +149,18 @@ def test_list_users_negative_with_invalid_queries(query_params, expected_status,
     assert expected_error in error_messages
 
 
+@pytest.mark.parametrize("query_params", [
+    "?after=not-a-cursor",  # Garbage cursor
+    "?after=' OR 1=1 --",  # Injection attempt
+])
+def test_list_users_invalid_cursor(query_params):
+    """Tests user listing with malformed cursors."""
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    response = requests.get(f"{BASE_URL}{query_params}", headers=headers)
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.json()["detail"]
+
+
 # EDGE TEST CASES
 @pytest.mark.parametrize("query_params, expected_status", [
     ("?limit=1", 200),  # Minimum Limit
@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from types import SimpleNamespace
+from app import loaders
+from app.database import db
+from app.loaders import UserLoader, USER_FIELDS, forget_users, user_memo_var
+
+# Test Users
+TEST_USERS = [{"name": f"Loader User {i}", "email": f"loader{i}@example.com", "password": "hash"} for i in range(3)]
+NON_EXISTENT_ID = "65a7b5c9f1d3c9e1b2a3d4e5"
+
+
+class CountingUsers:
+    """Stands in for `db.users` in the loaders module and records every query sent by `find`."""
+
+    def __init__(self, gate: asyncio.Event = None):
+        self.queries = []
+        self.gate = gate  # When set, the first query waits for it before returning users
+
+    def find(self, query, *args, **kwargs):
+        self.queries.append(query)
+        cursor = db.users.find(query, *args, **kwargs)
+        if self.gate is not None and len(self.queries) == 1:
+            return self._after_gate(cursor)
+        return cursor
+
+    async def _after_gate(self, cursor):
+        await self.gate.wait()
+        async for user in cursor:
+            yield user
+
+
+@pytest.fixture()
+def user_ids(run):
+    async def insert():
+        result = await db.users.insert_many([dict(user) for user in TEST_USERS])
+        return result.inserted_ids
+
+    ids = run(insert())
+    yield ids
+
+    # Cleanup test users directly from MongoDB
+    run(db.users.delete_many({"email": {"$in": [user["email"] for user in TEST_USERS]}}))
+
+
+def spy_on_users(monkeypatch, **kwargs) -> CountingUsers:
+    users = CountingUsers(**kwargs)
+    monkeypatch.setattr(loaders, "db", SimpleNamespace(users=users))
+    return users
+
+
+# POSITIVE TEST CASES
+def test_concurrent_loads_share_one_query(monkeypatch, run, user_ids):
+    """Concurrent lookups of the same and different keys are sent as one $in query."""
+    users = spy_on_users(monkeypatch)
+    loader = UserLoader("test_by_id", "_id", projection=USER_FIELDS)
+    keys = [user_ids[0], user_ids[1], user_ids[0], user_ids[2], ObjectId(NON_EXISTENT_ID)]
+
+    async def load_all():
+        return await asyncio.gather(*(loader.load(key) for key in keys))
+
+    results = run(load_all())
+
+    assert [user and user["name"] for user in results] == [
+        "Loader User 0", "Loader User 1", "Loader User 0", "Loader User 2", None,
+    ]
+    assert "password" not in results[0]
+    assert len(users.queries) == 1
+    assert len(users.queries[0]["_id"]["$in"]) == 4  # Duplicates are sent once
+
+
+def test_request_memo_skips_repeat_queries(monkeypatch, run, user_ids):
+    """Within a request, loading the same user again does not query the database."""
+    users = spy_on_users(monkeypatch)
+    loader = UserLoader("test_memo", "_id", projection=USER_FIELDS)
+
+    async def load_twice():
+        user_memo_var.set({})
+        first = await loader.load(user_ids[0])
+        first["name"] = "Changed by the caller"
+        return await loader.load(user_ids[0])
+
+    assert run(load_twice())["name"] == "Loader User 0"  # Callers get copies
+    assert len(users.queries) == 1
+
+
+# NEGATIVE TEST CASES
+def test_query_error_reaches_every_waiter(monkeypatch, run, user_ids):
+    """A failing query raises in every caller waiting for it."""
+    def failing_find(*args, **kwargs):
+        raise RuntimeError("query failed")
+
+    monkeypatch.setattr(loaders, "db", SimpleNamespace(users=SimpleNamespace(find=failing_find)))
+    loader = UserLoader("test_error", "_id", projection=USER_FIELDS)
+
+    async def load_all():
+        return await asyncio.gather(*(loader.load(user_id) for user_id in user_ids), return_exceptions=True)
+
+    results = run(load_all())
+    assert len(results) == len(user_ids)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_query(monkeypatch, run, user_ids):
+    """Cancelling one caller leaves the query running for the others."""
+    users = spy_on_users(monkeypatch)
+    loader = UserLoader("test_cancel", "_id", projection=USER_FIELDS)
+
+    async def cancel_one():
+        cancelled = asyncio.create_task(loader.load(user_ids[0]))
+        waiting = asyncio.create_task(loader.load(user_ids[0]))
+        await asyncio.sleep(0)  # Both callers join the same pending query
+        cancelled.cancel()
+        user = await waiting
+        return cancelled.cancelled(), user
+
+    was_cancelled, user = run(cancel_one())
+    assert was_cancelled
+    assert user["name"] == "Loader User 0"
+    assert len(users.queries) == 1
+
+
+def test_forget_users_after_write_sends_new_query(monkeypatch, run, user_ids):
+    """After a write, a lookup does not join the query started before it."""
+    gate = asyncio.Event()
+    users = spy_on_users(monkeypatch, gate=gate)
+    loader = UserLoader("test_forget", "_id", projection=USER_FIELDS)
+
+    async def write_during_lookup():
+        stale = asyncio.create_task(loader.load(user_ids[0]))
+        await asyncio.sleep(0.01)  # The first query is now in flight, held by the gate
+        await db.users.update_one({"_id": user_ids[0]}, {"$set": {"name": "Renamed"}})
+        forget_users()
+        fresh = await asyncio.wait_for(loader.load(user_ids[0]), timeout=5)
+        gate.set()
+        await stale
+        return fresh
+
+    fresh = run(write_during_lookup())
+    assert fresh["name"] == "Renamed"
+    assert len(users.queries) == 2
@@ -0,0 +1,63 @@
+import logging
+import pytest
+import random
+import requests
+from app.logging_config import SamplingFilter, parse_sample_rates
+
+# Base API URLs
+METRICS_URL = "http://localhost:8000/metrics"
+HOME_URL = "http://localhost:8000/"
+
+
+def test_metrics_exposition_format():
+    """Exposes Prometheus text format with the request metrics."""
+    requests.get(HOME_URL)
+    response = requests.get(METRICS_URL)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "http_requests_in_flight" in response.text
+
+
+def test_metrics_use_route_templates():
+    """Labels requests by route template rather than by raw path."""
+    requests.get("http://localhost:8000/api/users/65a7b5c9f1d3c9e1b2a3d4e5")
+    response = requests.get(METRICS_URL)
+
+    assert 'route="/api/users/{user_id}"' in response.text
+    assert "65a7b5c9f1d3c9e1b2a3d4e5" not in response.text
+
+
+def test_request_id_propagation():
+    """Echoes a client-supplied X-Request-ID and generates one otherwise."""
+    response = requests.get(HOME_URL, headers={"X-Request-ID": "trace-123"})
+    assert response.headers["X-Request-ID"] == "trace-123"
+
+    response = requests.get(HOME_URL)
+    assert response.headers["X-Request-ID"]
+
+
+def access_record(route="/api/users/{user_id}", status_code=200, level=logging.INFO):
+    return logging.makeLogRecord({"levelno": level, "method": "GET", "route": route, "status_code": status_code})
+
+
+def test_access_log_sampling_rate():
+    """Keeps about the configured fraction of successful access logs for a sampled route."""
+    random.seed(1234)
+    sampling = SamplingFilter(parse_sample_rates("GET /api/users/{user_id}=0.1, GET /api/users=0.5"))
+
+    kept = sum(sampling.filter(access_record()) for _ in range(10000))
+    assert 900 <= kept <= 1100
+
+
+@pytest.mark.parametrize("record", [
+    access_record(route="/api/users/import"),  # Route without a sample rate
+    access_record(status_code=404),  # Error responses
+    access_record(level=logging.WARNING),  # Warnings
+    logging.makeLogRecord({"levelno": logging.INFO, "msg": "Not an access log"}),
+])
+def test_access_log_sampling_keeps_other_records(record):
+    """Never drops errors, warnings, unsampled routes or records that are not access logs."""
+    sampling = SamplingFilter({"GET /api/users/{user_id}": 0.0})  # Drops every other access log of that route
+    assert all(sampling.filter(record) for _ in range(100))
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+import requests
+from fastapi import HTTPException
+from app import refresh_tokens
+from app.database import db
+from app.refresh_tokens import find_refresh_token, issue_refresh_token, rotate_refresh_token
+
+# **Base API URLs**
+REGISTER_URL = "http://localhost:8000/api/users"
+SIGNIN_URL = "http://localhost:8000/auth/signin"
+SIGNOUT_URL = "http://localhost:8000/auth/signout"
+REFRESH_URL = "http://localhost:8000/auth/refresh"
+
+# **Test Users**
+TEST_USER = {"name": "Refresh User", "email": "refresh@example.com", "password": "Password123!"}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_users():
+    requests.post(REGISTER_URL, json=TEST_USER)
+
+    yield  # Run tests
+
+    # Cleanup test users directly from MongoDB
+    db.users.delete_many({})  # Deletes all test users
+    db.refresh_tokens.delete_many({})
+
+
+def sign_in():
+    response = requests.post(SIGNIN_URL, json={"email": TEST_USER["email"], "password": TEST_USER["password"]})
+    assert response.status_code == 200
+    return response.json()
+
+
+# ** POSITIVE TEST CASES**
+def test_refresh_rotates_tokens():
+    """A refresh returns a working access token and a new refresh token."""
+    tokens = sign_in()
+    assert tokens["refresh_token"]
+
+    response = requests.post(REFRESH_URL, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["token_type"] == "bearer"
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    headers = {"Authorization": f"Bearer {refreshed['access_token']}"}
+    response = requests.get(REGISTER_URL, headers=headers)
+    assert response.status_code == 403  # Authenticated, but listing users is admin-only
+
+
+# ** NEGATIVE TEST CASES**
+@pytest.mark.parametrize("refresh_token", [
+    "invalid",  # TC-01: Malformed token
+    "0123456789abcdef.secret",  # TC-02: Unknown token
+    "' OR 1=1 --",  # TC-03: SQL Injection attempt
+])
+def test_refresh_invalid_token(refresh_token):
+    response = requests.post(REFRESH_URL, json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token"
+
+
+def test_signout_revokes_refresh_token():
+    tokens = sign_in()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = requests.post(SIGNOUT_URL, headers=headers, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+
+    assert requests.post(REFRESH_URL, json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+# REUSE TEST CASES (run in-process)
+def test_refresh_token_reuse_revokes_family(monkeypatch, run):
+    """Reusing a token rotated before the grace window revokes every token issued from the same signin."""
+    monkeypatch.setattr(refresh_tokens, "REFRESH_TOKEN_REUSE_GRACE", 0)
+
+    async def reuse():
+        token = await issue_refresh_token("reuse-user")
+        _, rotated = await rotate_refresh_token(token)
+        with pytest.raises(HTTPException) as reused:
+            await rotate_refresh_token(token)
+        with pytest.raises(HTTPException) as revoked:
+            await find_refresh_token(rotated)
+        return reused.value.status_code, revoked.value.status_code
+
+    assert run(reuse()) == (401, 401)
+
+
+def test_concurrent_refresh_keeps_family(run):
+    """Two tabs rotating the same token at once both get a working token; the session is not revoked."""
+    async def rotate_twice():
+        token = await issue_refresh_token("concurrent-user")
+        results = await asyncio.gather(rotate_refresh_token(token), rotate_refresh_token(token))
+        for _, new_token in results:
+            await rotate_refresh_token(new_token)  # Each successor still rotates normally
+        return results
+
+    (first_user, first_token), (second_user, second_token) = run(rotate_twice())
+    assert first_user == second_user == "concurrent-user"
+    assert first_token != second_token
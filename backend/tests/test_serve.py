@@ -0,0 +1,60 @@
+import asyncio
+import os
+import pytest
+from app import database, serve
+from app.main import app, lifespan
+
+
+# LIFESPAN TEST CASES (run in-process)
+def test_lifespan_opens_and_closes_mongo_client():
+    """Each worker creates its MongoDB client at startup, inside its own event loop, and closes it on shutdown."""
+    database.close_mongo_connection()
+
+    async def start_and_stop():
+        async with lifespan(app):
+            client = database.client
+            await database.db.command("ping")  # The warmed-up client serves requests
+        return client
+
+    client = asyncio.run(start_and_stop())
+    assert client is not None
+    assert database.client is None
+
+
+# ENTRY POINT TEST CASES
+@pytest.mark.parametrize("argv, expected_workers, expected_reload", [
+    (["--workers", "3"], 3, False),  # One process per worker
+    (["--workers", "0"], 1, False),  # At least one worker
+    (["--reload", "--workers", "4"], 1, True),  # Reload runs a single process
+])
+def test_serve_worker_settings(monkeypatch, argv, expected_workers, expected_reload):
+    """Starts uvicorn with the requested workers, without its own logging or access log."""
+    calls = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: calls.append((app, options)))
+    monkeypatch.setattr(serve, "setup_logging", lambda log_file: None)
+
+    serve.main(argv)
+
+    (app_path, options), = calls
+    assert app_path == "app.main:app"
+    assert (options["workers"], options["reload"]) == (expected_workers, expected_reload)
+    assert options["log_config"] is None
+    assert options["access_log"] is False
+
+
+@pytest.mark.parametrize("argv, expected_log_file", [
+    (["--workers", "1"], "app.log"),  # A single process keeps the rotated file
+    (["--workers", "3"], ""),  # Workers would rotate the same file: console only
+])
+def test_serve_log_file(monkeypatch, argv, expected_log_file):
+    """Only a single-process server writes the log file; workers inherit the setting through the environment."""
+    log_files = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: None)
+    monkeypatch.setattr(serve, "setup_logging", log_files.append)
+    monkeypatch.setattr(serve, "LOG_FILE", "app.log")
+    monkeypatch.setenv("LOG_FILE", "app.log")
+
+    serve.main(argv)
+
+    assert log_files == [expected_log_file]
+    assert os.environ["LOG_FILE"] == expected_log_file
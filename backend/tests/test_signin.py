@@ -1,7 +1,16 @@
+import asyncio
 import pytest
 import requests
 import time
+from fastapi import BackgroundTasks, HTTPException
+from starlette.requests import Request
+from app import login_throttle, security
+from app.models import SignInRequest
+from app.routes import auth
+from app.utils import rate_limiter
 from app.database import db
+from app.login_throttle import reserve_login_attempt, record_login_failure, record_login_success
+from app.security import build_password_context, password_needs_update, rehash_password
 
 # Base API URLs
 BASE_URL = "http://localhost:8000/auth/signin"
@@ -132,3 +141,177 @@ def test_csrf_attack():
 #     headers = {"Authorization": f"Bearer {token}"}
 #     response = requests.get("http://localhost:8000/protected-route", headers=headers)  # Example protected route
 #     assert response.status_code == 401  # Expect Unauthorized
+
+
+# PASSWORD REHASH TEST CASES
+def test_signin_rehashes_outdated_password(run):
+    """Signing in with a hash made at an older cost upgrades it once the response is sent."""
+    email, password = "rehash@example.com", "RehashPass1!"
+    old_hash = build_password_context(["bcrypt"], bcrypt_rounds=4).hash(password)
+    assert password_needs_update(old_hash)
+    user_id = run(db.users.insert_one({"name": "Rehash User", "email": email, "password": old_hash, "role": "user"})).inserted_id
+
+    try:
+        response = requests.post(BASE_URL, json={"email": email, "password": password})
+        assert response.status_code == 200
+
+        for _ in range(50):  # The rehash runs as a background task
+            new_hash = run(db.users.find_one({"_id": user_id}))["password"]
+            if new_hash != old_hash:
+                break
+            time.sleep(0.1)
+        assert new_hash != old_hash
+        assert not password_needs_update(new_hash)
+
+        # A password changed since sign-in is never overwritten by a pending rehash
+        run(rehash_password(user_id, old_hash, password))
+        assert run(db.users.find_one({"_id": user_id}))["password"] == new_hash
+    finally:
+        run(db.users.delete_one({"_id": user_id}))
+
+
+# THROTTLING TEST CASES (run in-process: the test server has the throttle disabled)
+THROTTLED_EMAIL = "throttled@example.com"
+THROTTLED_IP = "203.0.113.7"
+
+
+@pytest.fixture()
+def throttle(monkeypatch, run):
+    """Enables the login throttle with 2 free attempts and a 10s base delay."""
+    monkeypatch.setattr(login_throttle, "LOGIN_THROTTLE_ENABLED", True)
+    monkeypatch.setattr(login_throttle, "LOGIN_THROTTLE_EMAIL_ATTEMPTS", 2)
+    monkeypatch.setattr(login_throttle, "LOGIN_THROTTLE_IP_ATTEMPTS", 2)
+    monkeypatch.setattr(login_throttle, "LOGIN_THROTTLE_BASE_DELAY", 10)
+    monkeypatch.setattr(login_throttle, "LOGIN_THROTTLE_WINDOW", 5)
+    login_throttle.LOGIN_FAILURES.clear()
+    yield monkeypatch
+    login_throttle.LOGIN_FAILURES.clear()
+    run(db.login_failures.delete_many({}))
+
+
+async def failed_attempt(email: str = THROTTLED_EMAIL):
+    """Signs in with a wrong password; returns the Retry-After of a 429, or None if the attempt ran."""
+    try:
+        reservation = await reserve_login_attempt(email, THROTTLED_IP)
+    except HTTPException as e:
+        assert e.status_code == 429
+        return int(e.headers["Retry-After"])
+    await asyncio.sleep(0.01)  # Password verification
+    record_login_failure(reservation)
+
+
+@pytest.mark.parametrize("storage", ["memory", "mongo"])
+def test_signin_lockout_and_backoff(throttle, run, storage):
+    """Locks the email past its free attempts, doubling the delay on every further failure."""
+    throttle.setattr(login_throttle, "LOGIN_THROTTLE_STORAGE", storage)
+    throttle.setattr(login_throttle, "LOGIN_THROTTLE_IP_ATTEMPTS", 100)
+    now = time.time()
+    throttle.setattr(login_throttle.time, "time", lambda: now)
+
+    async def attempts():
+        return [await failed_attempt() for _ in range(4)]
+
+    assert run(attempts()) == [None, None, None, 10]  # Third failure locks for 10s
+
+    now += 11
+    assert run(attempts())[:2] == [None, 20]  # Next failure doubles the delay
+
+    if storage == "mongo":  # The shared counter outlives the lock, not just the window
+        state = run(db.login_failures.find_one({"_id": login_throttle.throttle_keys(THROTTLED_EMAIL, THROTTLED_IP)[0][0]}))
+        assert state["failures"] == 4
+        assert state["locked_until"] == now + 20
+
+
+@pytest.mark.parametrize("storage", ["memory", "mongo"])
+def test_concurrent_signin_attempts_are_counted(throttle, run, storage):
+    """Concurrent failures cannot all pass the check before any of them is recorded."""
+    throttle.setattr(login_throttle, "LOGIN_THROTTLE_STORAGE", storage)
+
+    async def burst():
+        return await asyncio.gather(*(failed_attempt() for _ in range(6)))
+
+    results = run(burst())
+    assert results.count(None) == 3  # Two free attempts and the one that locks
+    assert all(retry_after == 10 for retry_after in results if retry_after is not None)
+
+
+def test_signin_success_releases_attempt(throttle, run):
+    """A successful sign-in resets the email and gives the IP its slot back."""
+    async def attempts():
+        await failed_attempt()
+        await failed_attempt("other@example.com")
+        reservation = await reserve_login_attempt(THROTTLED_EMAIL, THROTTLED_IP)  # Would lock the IP if it failed
+        await record_login_success(reservation)
+        return await failed_attempt()
+
+    assert run(attempts()) is None
+    email_key, ip_key = (key for key, _ in login_throttle.throttle_keys(THROTTLED_EMAIL, THROTTLED_IP))
+    assert login_throttle.LOGIN_FAILURES.get(email_key)[0] == 1
+    assert login_throttle.LOGIN_FAILURES.get(ip_key)[0] == 3
+
+
+def raise_db_error(*args, **kwargs):
+    raise RuntimeError("database unavailable")
+
+async def raise_busy(*args, **kwargs):
+    raise HTTPException(status_code=503, detail="Server busy. Try again later.")
+
+
+@pytest.mark.parametrize("target, name, fail, expected_error", [
+    (auth.users_by_email, "load", raise_db_error, RuntimeError),  # User lookup fails
+    (security, "run_in_hash_pool", raise_busy, HTTPException),  # Hash pool is saturated (503)
+], ids=["lookup_error", "hash_pool_busy"])
+def test_signin_errors_do_not_count_as_failures(throttle, run, target, name, fail, expected_error):
+    """Sign-ins that error out before the password is checked give their attempt back."""
+    password = "ThrottledPass1!"
+    password_hash = build_password_context(["bcrypt"], bcrypt_rounds=4).hash(password)
+    user_id = run(db.users.insert_one({"name": "Throttled User", "email": THROTTLED_EMAIL, "password": password_hash, "role": "user"})).inserted_id
+    request = Request({"type": "http", "headers": [], "client": (THROTTLED_IP, 1234)})
+
+    def sign_in():
+        form = SignInRequest(email=THROTTLED_EMAIL, password=password)
+        return run(auth.signin(request, form, BackgroundTasks()))
+
+    try:
+        with throttle.context() as patch:
+            patch.setattr(target, name, fail)
+            for _ in range(5):  # More than the free attempts
+                with pytest.raises(expected_error):
+                    sign_in()
+            for key, _ in login_throttle.throttle_keys(THROTTLED_EMAIL, THROTTLED_IP):
+                assert login_throttle.LOGIN_FAILURES.get(key, (0, 0))[0] == 0  # Failure counters unchanged
+
+        assert "access_token" in sign_in()
+    finally:
+        run(db.users.delete_one({"_id": user_id}))
+
+
+# RATE LIMIT TEST CASES (run in-process: the test server has rate limits disabled)
+@pytest.fixture()
+def signin_rate_limit(monkeypatch):
+    """Enables rate limiting with a sign-in policy of 2 requests per minute, halfway through a window."""
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_STORAGE", "memory")
+    monkeypatch.setitem(rate_limiter.POLICIES, "signin", rate_limiter.RateLimitPolicy("signin", "2/minute", "sliding_window", "ip"))
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: 1_000_000 * 60 + 30)
+    rate_limiter.RATE_LIMIT_CACHE.clear()
+    yield rate_limiter.rate_limit("signin")
+    rate_limiter.RATE_LIMIT_CACHE.clear()
+
+
+def test_signin_rate_limit(signin_rate_limit, run):
+    """Rejects sign-ins over the policy with 429 and a Retry-After header."""
+    request = Request({"type": "http", "headers": [], "client": (THROTTLED_IP, 1234)})
+    run(signin_rate_limit(request))
+    run(signin_rate_limit(request))
+
+    with pytest.raises(HTTPException) as e:
+        run(signin_rate_limit(request))
+    assert e.value.status_code == 429
+    assert e.value.headers["Retry-After"] == "30"  # The current window closes in 30s
+
+
+def test_signin_rate_limit_at_weighted_limit():
+    """A weighted count exactly at the limit still waits instead of letting the request through."""
+    policy = rate_limiter.RateLimitPolicy("signin", "10/minute", "sliding_window", "ip")
+    assert rate_limiter.window_retry_after(policy, previous=10, current=5, elapsed=0.5) > 0
@@ -1,6 +1,12 @@
 import pytest
 import requests
+import time
+from bson import ObjectId
+from datetime import timedelta
+from fastapi import HTTPException
 from app.database import db
+from app.security import TOKEN_CACHE, create_access_token, get_current_user, invalidate_token, token_digest, verify_access_token
+from app.utils import cache
 
 # **Base API URLs**
 REGISTER_URL = "http://localhost:8000/api/users"
@@ -95,6 +101,47 @@ def test_signout_edge_cases(auth_token, expected_status, expected_error):
     assert expected_error in response.json()["detail"]
 
 
+def test_signed_out_token_rejected_everywhere():
+    """A signed-out token must no longer authenticate any endpoint."""
+    user = TEST_USERS[1]
+    response = requests.post(SIGNIN_URL, json={"email": user["email"], "password": user["password"]})
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    assert requests.get(REGISTER_URL, headers=headers).status_code == 200
+    assert requests.post(SIGNOUT_URL, headers=headers).status_code == 200
+
+    response = requests.get(REGISTER_URL, headers=headers)
+    assert response.status_code == 401
+    assert "Invalid token" in response.json()["detail"]
+
+
+def test_cached_token_rejected_after_signout(run):
+    """Signing out drops a token whose claims were cached just before, so it cannot authenticate again."""
+    token = create_access_token({"sub": str(ObjectId())})
+    verify_access_token(token)
+    assert TOKEN_CACHE.get(token_digest(token)) is not None
+
+    run(invalidate_token(token))
+    assert TOKEN_CACHE.get(token_digest(token)) is None
+
+    with pytest.raises(HTTPException) as e:
+        run(get_current_user(token))
+    assert e.value.status_code == 401
+    assert e.value.detail == "Invalid token"
+
+
+def test_token_cache_entry_expires_with_token(monkeypatch):
+    """A cached token expires with the token, even when TOKEN_CACHE_TTL is longer."""
+    token = create_access_token({"sub": str(ObjectId())}, expires_delta=timedelta(seconds=2))
+    verify_access_token(token)
+    assert TOKEN_CACHE.get(token_digest(token)) is not None
+
+    now = time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 3)
+    assert TOKEN_CACHE.get(token_digest(token)) is None
+
+
 # ** SECURITY TEST CASES**
 @pytest.mark.parametrize("auth_token, expected_status, expected_error", [
     ("' OR 1=1 --", 401, "Invalid token"),  # TC-12: SQL Injection attempt
@@ -1,6 +1,11 @@
 import pytest
 import requests
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from app import security
 from app.database import db
+from app.routes.users import update_user_in_db
+from app.security import access_token_claims, create_access_token, get_current_user
 
 # Base API URLs
 BASE_URL = "http://localhost:8000/api/users"
@@ -133,3 +138,55 @@ def test_update_user_security(user_id, update_data, expected_status, expected_er
     assert expected_error in response.json()["detail"]
 
 
+# AUTHORIZATION TEST CASES
+@pytest.mark.parametrize("target, as_admin, expected_status, expected_error", [
+    ("65a7b5c9f1d3c9e1b2a3d4e5", False, 404, "User not found"),  # Non-admin, user does not exist
+    ("john@example.com", False, 403, "Forbidden: Access denied"),  # Non-admin, someone else's profile
+    ("65a7b5c9f1d3c9e1b2a3d4e5", True, 404, "User not found"),  # Admin, user does not exist
+])
+def test_update_user_not_found_or_forbidden(target, as_admin, expected_status, expected_error):
+    """Tells a missing user (404) apart from someone else's profile (403)."""
+    user_id = USER_IDS.get(target, target)
+    if as_admin:
+        token = TOKEN
+    else:
+        user = TEST_USERS[1]
+        token = requests.post(SIGNIN_URL, json={"email": user["email"], "password": user["password"]}).json()["access_token"]
+    response = requests.put(f"{BASE_URL}/{user_id}", json={"name": "Other Name"}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == expected_status
+    assert response.json()["detail"] == expected_error
+
+
+# STATELESS TOKEN TEST CASES (run in-process with STATELESS_AUTH enabled)
+@pytest.mark.parametrize("update_data, still_valid", [
+    ({"role": "admin"}, False),  # Role change invalidates older tokens
+    ({"password": "new-hash"}, False),  # Password change invalidates older tokens
+    ({"name": "Renamed"}, True),  # Profile changes keep them valid
+])
+def test_stateless_token_after_update(monkeypatch, run, update_data, still_valid):
+    """A stateless token issued before a role or password change is rejected after it."""
+    monkeypatch.setattr(security, "STATELESS_AUTH", True)
+    user = {"name": "Stateless User", "email": "stateless@example.com", "password": "hash", "role": "user",
+            "created": datetime.now(timezone.utc)}
+
+    async def use_token_across_update():
+        user["_id"] = (await db.users.insert_one(user)).inserted_id
+        try:
+            token = create_access_token(access_token_claims(user))
+            principal = await get_current_user(token)  # Also caches the token version
+            await update_user_in_db(user["_id"], dict(update_data), principal)
+            try:
+                await get_current_user(token)
+                return None
+            except HTTPException as e:
+                return e
+        finally:
+            await db.users.delete_one({"_id": user["_id"]})
+
+    error = run(use_token_across_update())
+    if still_valid:
+        assert error is None
+    else:
+        assert error.status_code == 401
+        assert error.detail == "Invalid token"
@@ -1,4 +1,5 @@
 import axios from "axios";
+import { jwtDecode } from "jwt-decode";
 import { BASE_URL, getAuthHeaders } from "./config";
 
 /**
@@ -30,12 +31,12 @@ export const registerUser = async (data: { name: string; email: string; password
  * @returns {Promise<{ access_token: string; token_type: string }>} The access token and token type.
  * @throws {string} Error message if authentication fails.
  */
-export const signInUser = async (credentials: { email: string; password: string }): Promise<{ access_token: string; token_type: string }> => {
+export const signInUser = async (credentials: { email: string; password: string }): Promise<{ access_token: string; token_type: string; refresh_token?: string }> => {
     try {
       const response = await axios.post(`${BASE_URL}/auth/signin`, credentials);
       
       // Store JWT token in local storage for authentication
-      localStorage.setItem("accessToken", response.data.access_token);
+      storeTokens(response.data);
   
       return response.data;
     } catch (error: unknown) {
@@ -46,6 +47,61 @@ export const signInUser = async (credentials: { email: string; password: string
     }
 };
 
+/**
+ * Exchanges the stored refresh token for a new access token (and refresh token),
+ * without asking for the password again.
+ *
+ * Tabs take turns through a Web Lock and re-read the tokens once they hold it, so a
+ * tab whose session was just renewed by another tab reuses that access token instead
+ * of presenting a refresh token that was already rotated.
+ *
+ * @param {number} minValidityMs - A stored access token still valid for longer than this is returned as is.
+ * @returns {Promise<string>} The new access token.
+ * @throws {string} Error message if the refresh token is missing, expired or revoked.
+ */
+export const refreshAccessToken = async (minValidityMs: number = 0): Promise<string> => {
+    if (typeof navigator !== "undefined" && navigator.locks) {
+        return navigator.locks.request("auth-refresh", () => postRefresh(minValidityMs));
+    }
+    return postRefresh(minValidityMs);
+};
+
+/**
+ * Posts the refresh token read from local storage right before the request.
+ */
+const postRefresh = async (minValidityMs: number): Promise<string> => {
+    const accessToken = getToken();
+    if (accessToken && tokenExpiresAt(accessToken) - Date.now() > minValidityMs) {
+        return accessToken; // Another tab already renewed the session
+    }
+    const refreshToken = getRefreshToken();
+    if (!refreshToken) {
+        throw "No refresh token";
+    }
+    try {
+        const response = await axios.post(`${BASE_URL}/auth/refresh`, { refresh_token: refreshToken });
+        storeTokens(response.data);
+        return response.data.access_token;
+    } catch (error: unknown) {
+        clearTokens();
+        if (axios.isAxiosError(error)) {
+            throw error.response?.data?.detail || "Session expired";
+        }
+        throw new Error("An unexpected error occurred");
+    }
+};
+
+/**
+ * Returns when an access token expires, in milliseconds (0 if it cannot be decoded).
+ */
+const tokenExpiresAt = (token: string): number => {
+    try {
+        return (jwtDecode<{ exp?: number }>(token).exp ?? 0) * 1000;
+    } catch {
+        return 0;
+    }
+};
+
 /**
  * Signs out the user by removing the JWT token from local storage.
  */
@@ -53,11 +109,11 @@ export const signOutUser = async () => {
     try {
         const response = await axios.post(
             `${BASE_URL}/auth/signout`, 
-            {}, // Empty body
+            { refresh_token: getRefreshToken() }, // Revoke the refresh token too
             { headers: getAuthHeaders() } // Include the Authorization header
         );
         
-        localStorage.removeItem("accessToken");
+        clearTokens();
     
         return response.data;
     } catch (error: unknown) {
@@ -69,6 +125,33 @@ export const signOutUser = async () => {
     
 };
 
+/**
+ * Stores the tokens returned by sign-in or refresh.
+ */
+const storeTokens = (tokens: { access_token: string; refresh_token?: string }) => {
+    localStorage.setItem("accessToken", tokens.access_token);
+    if (tokens.refresh_token) {
+        localStorage.setItem("refreshToken", tokens.refresh_token);
+    }
+};
+
+/**
+ * Removes both tokens from local storage.
+ */
+export const clearTokens = () => {
+    localStorage.removeItem("accessToken");
+    localStorage.removeItem("refreshToken");
+};
+
+/**
+ * Retrieves the refresh token from local storage.
+ *
+ * @returns {string | null} The stored refresh token, or null if not found.
+ */
+export const getRefreshToken = (): string | null => {
+    return localStorage.getItem("refreshToken");
+};
+
 /**
  * Retrieves the JWT token from local storage.
  *
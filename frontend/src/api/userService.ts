@@ -2,15 +2,26 @@ import axios from "axios";
 import { BASE_URL, getAuthHeaders } from "./config";
 
 /**
- * Fetches a list of users.
+ * Fetches a page of users.
  *
- * @returns {Promise<any[]>} The API response.
+ * @param {string} [after] - Cursor returned with the previous page.
+ * @param {number} [limit] - Page size (max 100).
+ * @returns {Promise<{ users: any[]; nextCursor: string | null; total: number | null }>} The users, the cursor of the next page
+ * and the total number of users (first page only).
  * @throws {string} Error message if request fails.
  */
-export const fetchUsers = async (): Promise<any[]> => {
+export const fetchUsers = async (after?: string, limit: number = 100): Promise<{ users: any[]; nextCursor: string | null; total: number | null }> => {
   try {
-    const response = await axios.get(`${BASE_URL}/api/users`,{ headers: getAuthHeaders() }); // Include the Authorization header
-    return response.data;
+    const response = await axios.get(`${BASE_URL}/api/users`, {
+      headers: getAuthHeaders(), // Include the Authorization header
+      params: after ? { after, limit, count: false } : { limit }, // The total is only needed once
+    });
+    const total = response.headers["x-total-count"];
+    return {
+      users: response.data,
+      nextCursor: response.headers["x-next-cursor"] ?? null,
+      total: total !== undefined ? Number(total) : null,
+    };
   } catch (error: unknown) {
     if (axios.isAxiosError(error)) {
         throw error.response?.data?.detail || "Failed to fetch users";
@@ -19,6 +30,29 @@ export const fetchUsers = async (): Promise<any[]> => {
   }
 };
 
+/**
+ * Retrieves several profiles with one request.
+ *
+ * @param {string[]} userIds - The IDs of the users (max 100).
+ * @returns {Promise<{ found: any[]; missing: string[]; forbidden: string[] }>} The profiles, and the IDs that do not exist
+ * or may not be read.
+ * @throws {string} Error message if request fails.
+ */
+export const getUserProfiles = async (userIds: string[]): Promise<{ found: any[]; missing: string[]; forbidden: string[] }> => {
+  try {
+    const response = await axios.get(`${BASE_URL}/api/users`, {
+      headers: getAuthHeaders(),
+      params: { ids: userIds.join(",") },
+    });
+    return response.data;
+  } catch (error: unknown) {
+    if (axios.isAxiosError(error)) {
+        throw error.response?.data?.detail || "Failed to fetch user profiles";
+    }
+    throw new Error("An unexpected error occurred");
+  }
+};
+
 /**
  * Retrieves the profile of a user by their ID.
  *
@@ -1,5 +1,5 @@
-import React, { createContext, useState, useEffect, ReactNode } from "react";
-import { signInUser, signOutUser, getToken, isAuthenticated } from "../api/authService";
+import React, { createContext, useState, useEffect, useRef, ReactNode } from "react";
+import { signInUser, signOutUser, refreshAccessToken, clearTokens, getToken, getRefreshToken, isAuthenticated } from "../api/authService";
 import { jwtDecode } from "jwt-decode";
 
 interface AuthContextType {
@@ -19,24 +19,61 @@ interface DecodedUser {
 
 export const AuthContext = createContext<AuthContextType | null>(null);
 
+// Renew the access token this long before it expires
+const RENEW_BEFORE_EXPIRY_MS = 60 * 1000;
+
 export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) => {
   const [user, setUser] = useState<any>(null);
   const [userId, setUserId] = useState<any>(null); // Store userId separately
   const [authenticated, setAuthenticated] = useState<boolean>(isAuthenticated());
   const [logoutMessage, setLogoutMessage] = useState<string | null>(null); // Logout message state
+  const renewTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  /**
+   * Applies an access token and schedules its silent renewal shortly before it expires.
+   */
+  const applyToken = (token: string) => {
+    const decodedUser: DecodedUser = jwtDecode(token);
+    setUser(decodedUser);
+    setUserId(decodedUser.sub); // Extract userId from `sub`
+    setAuthenticated(true);
+
+    if (renewTimer.current) {
+      clearTimeout(renewTimer.current);
+    }
+    if (getRefreshToken()) {
+      const delay = Math.max(decodedUser.exp * 1000 - Date.now() - RENEW_BEFORE_EXPIRY_MS, 0);
+      renewTimer.current = setTimeout(renewSession, delay);
+    }
+  };
+
+  /**
+   * Gets a new access token with the refresh token, unless another tab already did;
+   * signs out locally if that fails.
+   */
+  const renewSession = async () => {
+    try {
+      applyToken(await refreshAccessToken(RENEW_BEFORE_EXPIRY_MS));
+    } catch {
+      handleTokenExpiration();
+    }
+  };
 
   useEffect(() => {
     const token = getToken();
     if (token) {
       try {
         const decodedUser: DecodedUser = jwtDecode(token);
-        setUser(decodedUser);
-        setUserId(decodedUser.sub); // Extract userId from `sub`
-        setAuthenticated(true);
 
-        // Check if token has expired
+        // Expired tokens are renewed silently when a refresh token is available
         if (decodedUser.exp * 1000 < Date.now()) {
-          handleTokenExpiration();
+          if (getRefreshToken()) {
+            renewSession();
+          } else {
+            handleTokenExpiration();
+          }
+        } else {
+          applyToken(token);
         }
       } catch {
         setUser(null);
@@ -44,14 +81,40 @@ export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
         setAuthenticated(false);
       }
     }
+
+    // Follow renewals and sign-outs made in other tabs
+    const onStorage = (event: StorageEvent) => {
+      if (event.key !== "accessToken") {
+        return;
+      }
+      if (event.newValue) {
+        try {
+          applyToken(event.newValue);
+        } catch {
+          handleTokenExpiration();
+        }
+      } else {
+        if (renewTimer.current) {
+          clearTimeout(renewTimer.current);
+        }
+        setAuthenticated(false);
+        setUser(null);
+        setUserId(null);
+      }
+    };
+    window.addEventListener("storage", onStorage);
+
+    return () => {
+      window.removeEventListener("storage", onStorage);
+      if (renewTimer.current) {
+        clearTimeout(renewTimer.current);
+      }
+    };
   }, []);
 
   const login = async (email: string, password: string) => {
     const response = await signInUser({ email, password });
-    setAuthenticated(true);
-    const decodedUser = jwtDecode(response.access_token);
-    setUser(decodedUser);
-    setUserId(decodedUser.sub); // Store the user ID
+    applyToken(response.access_token);
   };
 
   /**
@@ -60,6 +123,9 @@ export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
   const logout = async () => {
     try {
       await signOutUser();
+      if (renewTimer.current) {
+        clearTimeout(renewTimer.current);
+      }
       setLogoutMessage("You have been logged out successfully.");
       
       setTimeout(() => {
@@ -77,7 +143,7 @@ export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
    * Handles token expiration by logging out the user and redirecting to sign-in.
    */
   const handleTokenExpiration = () => {
-    localStorage.removeItem("accessToken");
+    clearTokens();
     setAuthenticated(false);
     setUser(null);
     setUserId(null);
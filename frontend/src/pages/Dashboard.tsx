@@ -21,6 +21,8 @@ const Dashboard: React.FC = () => {
 
   const { user, isAuthenticated, logout } = authContext;
   const [users, setUsers] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [totalUsers, setTotalUsers] = useState<number | null>(null);
 
   /**
    * Fetch users when authenticated.
@@ -32,8 +34,10 @@ const Dashboard: React.FC = () => {
 
     const loadUsers = async () => {
       try {
-        const data = await fetchUsers();
-        setUsers(data);
+        const page = await fetchUsers();
+        setUsers(page.users);
+        setNextCursor(page.nextCursor);
+        setTotalUsers(page.total);
       } catch (error) {
         console.error("Failed to load users", error);
       }
@@ -42,12 +46,26 @@ const Dashboard: React.FC = () => {
     loadUsers();
   }, [isAuthenticated, navigate]);
 
+  /**
+   * Fetch the next page of users.
+   */
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      const page = await fetchUsers(nextCursor);
+      setUsers((current) => [...current, ...page.users]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Failed to load users", error);
+    }
+  };
+
   return (
     <div className="container mx-auto p-6 mt-20">
       <h2 className="text-3xl font-bold text-gray-800 mb-6">Dashboard</h2>
 
       <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-6">
-        <DashboardCard title="Total Users" value={users.length} />
+        <DashboardCard title="Total Users" value={totalUsers ?? users.length} />
         <DashboardCard title="Role" value={user?.role || "User"} />
         <DashboardCard title="Email" value={user?.email} />
       </div>
@@ -55,6 +73,11 @@ const Dashboard: React.FC = () => {
       <div className="mt-10">
         <h3 className="text-2xl font-semibold mb-4">Manage Users</h3>
         <UserTable users={users} />
+        {nextCursor && (
+          <div className="flex justify-center mt-4">
+            <ActionButton text="Load more" onClick={loadMore} />
+          </div>
+        )}
       </div>
 
       <div className="flex justify-end mt-6">